@@ -0,0 +1,53 @@
+import os
+
+SPRITES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sprites")
+
+# Sprite sizes, so the simulation never needs pygame or the images
+PLAYER_WIDTH = 124
+PLAYER_HEIGHT = 120
+PLATFORM_WIDTH = 105
+PLATFORM_HEIGHT = 31
+
+# Asset Manager
+# Imports pygame and loads sprites and fonts only when rendering first asks
+# for them. Loading needs a display mode to be set, so sprites can be
+# converted to the display's pixel format.
+class Assets:
+    def __init__(self, sprites_dir=SPRITES_DIR):
+        self.sprites_dir = sprites_dir
+        self.loaded = False
+
+    def load(self):
+        if self.loaded:
+            return self
+
+        import pygame
+
+        pygame.font.init()
+
+        self.player_sprite_right = self.sprite("player.png", PLAYER_WIDTH, PLAYER_HEIGHT)
+        self.player_sprite_left = pygame.transform.flip(self.player_sprite_right, True, False)
+        self.player_jump_sprite_right = self.sprite("player_jump.png", PLAYER_WIDTH, PLAYER_HEIGHT)
+        self.player_jump_sprite_left = pygame.transform.flip(self.player_jump_sprite_right, True, False)
+        self.platform_sprite = self.sprite("platform.png", PLATFORM_WIDTH, PLATFORM_HEIGHT)
+        self.bg_sprite = self.sprite("bg.png")
+        self.score_font = pygame.font.SysFont("Verdana", 36)
+        self.debug_font = pygame.font.SysFont("Verdana", 14)
+        self.loaded = True
+
+        return self
+
+    # Load a sprite, checking it still has the size the simulation uses
+    def sprite(self, filename, width=None, height=None):
+        import pygame
+
+        image = pygame.image.load(os.path.join(self.sprites_dir, filename)).convert_alpha()
+
+        if width is not None and image.get_size() != (width, height):
+            raise ValueError("Sprite {0} is {1}x{2}, expected {3}x{4}".format(
+                filename, image.get_width(), image.get_height(), width, height
+            ))
+
+        return image
+
+ASSETS = Assets()
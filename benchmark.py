@@ -0,0 +1,403 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import importlib.util
+import numpy as np
+import neat
+from networks import PopulationNetwork
+from platforms import PlatformBatch
+from episodes import EpisodePolicy
+from profiling import FrameProfiler
+
+LOCAL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Metrics where lower is better, all others are rates
+LOWER_IS_BETTER = ["seconds_per_generation", "seconds_per_level_batch"]
+
+# Load doodle-jump.py, which can't be imported by name
+def load_game():
+    spec = importlib.util.spec_from_file_location(
+        "doodle_jump",
+        os.path.join(LOCAL_DIR, "doodle-jump.py")
+    )
+    game = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(game)
+
+    return game
+
+def load_config():
+    return neat.config.Config(
+        neat.DefaultGenome,
+        neat.DefaultReproduction,
+        neat.DefaultSpeciesSet,
+        neat.DefaultStagnation,
+        os.path.join(LOCAL_DIR, "config")
+    )
+
+# Fresh genomes without speciating them, which is slow for large populations
+def create_genomes(config, size, seed):
+    random.seed(seed)
+    genomes = []
+
+    for key in range(size):
+        genome = config.genome_type(key)
+        genome.configure_new(config.genome_config)
+        genomes.append((key, genome))
+
+    return genomes
+
+# Population state with players scattered over the window
+def scattered_state(game, size, seed):
+    rng = np.random.default_rng(seed)
+    state = game.PopulationState(size, 0, 0)
+    state.x[:] = rng.uniform(0, game.WINDOW_WIDTH, size)
+    state.y[:] = rng.uniform(0, game.WINDOW_HEIGHT, size)
+
+    return state
+
+# Frames per second of the headless simulation loop
+def bench_frames(game, config, size, frames, seed):
+    genomes = create_genomes(config, size, seed)
+    level = game.LEVELS.level(seed)
+
+    # Play all frames, so every run times the same work
+    policy = EpisodePolicy(frames, stop_at_threshold=False)
+
+    start = time.perf_counter()
+    simulated = game.simulate(genomes, config, [level], True, policy)
+
+    return simulated / (time.perf_counter() - start)
+
+# Rays cast per second by the population sensor
+def bench_rays(game, size, repeats, seed):
+    state = scattered_state(game, size, seed)
+    platforms = PlatformBatch([game.generateInitialPlatforms(game.LEVELS.level(seed))])
+    index = state.living()
+
+    start = time.perf_counter()
+
+    for _ in range(repeats):
+        state.sense(index, platforms)
+
+    rays = size * len(game.RAY_SENSOR.polygons) * repeats
+
+    return rays / (time.perf_counter() - start)
+
+# Player - platform collisions checked per second
+def bench_collisions(game, size, repeats, seed):
+    state = scattered_state(game, size, seed)
+    platforms = PlatformBatch([game.generateInitialPlatforms(game.LEVELS.level(seed))])
+
+    start = time.perf_counter()
+
+    for _ in range(repeats):
+        state.land(platforms)
+
+    return size * int(platforms.count.sum()) * repeats / (time.perf_counter() - start)
+
+# Network activations per second of the batched population network, with
+# all genomes or, like late frames of an episode, only `living` of them
+def bench_activations(config, size, repeats, seed, living=None):
+    genomes = [g for _, g in create_genomes(config, size, seed)]
+    network = PopulationNetwork(genomes, config)
+    rng = np.random.default_rng(seed)
+    index = np.arange(size) if living is None else np.sort(rng.choice(size, living, replace=False))
+    inputs = rng.integers(0, 2, (len(index), config.genome_config.num_inputs))
+
+    start = time.perf_counter()
+
+    for _ in range(repeats):
+        network.actions(index, inputs)
+
+    return len(index) * repeats / (time.perf_counter() - start)
+
+# Wall time per NEAT generation with the project config
+def bench_generations(game, config, generations, frames, seed):
+    random.seed(seed)
+    p = neat.Population(config)
+    evaluator = game.Evaluator(True, EpisodePolicy(frames), seed)
+
+    start = time.perf_counter()
+    p.run(evaluator.evaluate, generations)
+
+    return (time.perf_counter() - start) / generations
+
+# Compare event-driven simulation against the frame loop, for the whole
+# population and every genome on its own, at each decision interval,
+# returns the number of runs whose frame count or fitnesses differ
+def check_event_driven(game, config, size, levels, frames, seed, intervals=(1,)):
+    genomes = create_genomes(config, size, seed)
+    groups = [genomes] + [[genome] for genome in genomes]
+    mismatches = 0
+
+    for level_seed in range(seed, seed + levels):
+        for group in groups:
+            for policy in [EpisodePolicy(frames, stop_at_threshold=False), EpisodePolicy(frames, 6)]:
+                for interval in intervals:
+                    results = []
+
+                    for event_driven in [False, True]:
+                        simulated = game.simulate(
+                            group,
+                            config,
+                            [game.LEVELS.level(level_seed)],
+                            True,
+                            policy,
+                            event_driven=event_driven,
+                            decision_interval=interval
+                        )
+                        results.append((simulated, [g.fitness for _, g in group]))
+
+                    if results[0] != results[1]:
+                        mismatches += 1
+
+    return mismatches
+
+# Frames per second of genomes played on their own, as pool workers do,
+# with the frame loop and event-driven
+def bench_solo_frames(game, config, size, frames, seed, event_driven):
+    genomes = create_genomes(config, size, seed)
+    level = game.LEVELS.level(seed)
+    policy = EpisodePolicy(frames, stop_at_threshold=False)
+    simulated = 0
+
+    start = time.perf_counter()
+
+    for genome in genomes:
+        simulated += game.simulate([genome], config, [level], True, policy, event_driven=event_driven)
+
+    return simulated / (time.perf_counter() - start)
+
+# Compare genomes playing several levels at once against playing them one
+# by one, with the whole population and every genome on its own, returns
+# the number of runs whose fitnesses differ
+def check_level_batch(game, config, size, levels, frames, seed):
+    genomes = create_genomes(config, size, seed)
+    level_list = [game.LEVELS.level(level_seed) for level_seed in range(seed, seed + levels)]
+    mismatches = 0
+
+    for policy in [EpisodePolicy(frames, stop_at_threshold=False), EpisodePolicy(frames, 6)]:
+        for solo in [False, True]:
+            fitnesses = []
+
+            for level in level_list:
+                if solo:
+                    for genome in genomes:
+                        game.simulate([genome], config, [level], True, policy)
+                else:
+                    game.simulate(genomes, config, [level], True, policy)
+
+                fitnesses.append([g.fitness for _, g in genomes])
+
+            for aggregate in ["mean", "min", "0.25"]:
+                game.simulate(genomes, config, level_list, True, policy, solo=solo, aggregate=aggregate)
+                expected = game.aggregate_fitness(np.array(fitnesses), aggregate).tolist()
+
+                if [g.fitness for _, g in genomes] != expected:
+                    mismatches += 1
+
+    return mismatches
+
+# Wall time of genomes playing each number of levels on their own, all at
+# once, as pool workers do
+def bench_level_batch(game, config, size, levels, frames, seed):
+    genomes = create_genomes(config, size, seed)
+    policy = EpisodePolicy(frames, stop_at_threshold=False)
+    seconds = {}
+
+    for count in levels:
+        level_list = [game.LEVELS.level(level_seed) for level_seed in range(seed, seed + count)]
+
+        start = time.perf_counter()
+        game.simulate(genomes, config, level_list, True, policy, solo=True)
+        seconds[str(count)] = time.perf_counter() - start
+
+    return seconds
+
+# Network activations, time spent sensing and activating, frame rate and
+# fitness of the same genomes on the same levels at each decision interval
+def bench_decision_intervals(game, config, size, intervals, levels, frames, seed):
+    genomes = create_genomes(config, size, seed)
+    level_list = [game.LEVELS.level(level_seed) for level_seed in range(seed, seed + levels)]
+    policy = EpisodePolicy(frames, stop_at_threshold=False)
+    stats = {}
+
+    for interval in intervals:
+        profiler = FrameProfiler()
+
+        start = time.perf_counter()
+        simulated = game.simulate(genomes, config, level_list, True, policy, profiler, decision_interval=interval)
+        seconds = time.perf_counter() - start
+
+        summary = profiler.summary()
+        fitnesses = np.array([g.fitness for _, g in genomes])
+        stats[str(interval)] = {
+            "frames_per_second": simulated / seconds,
+            "agent_frames": summary["agent_frames"],
+            "agent_decisions": summary["agent_decisions"],
+            "sensing_seconds": summary["phases"]["sensing"]["total"],
+            "activation_seconds": summary["phases"]["activation"]["total"],
+            "mean_fitness": float(fitnesses.mean()),
+            "best_fitness": float(fitnesses.max())
+        }
+
+    return stats
+
+# Print how each decision interval compares to deciding every frame
+def print_decision_report(stats):
+    base = stats[min(stats, key=int)]
+
+    print("interval  decisions  saved  sensing+activation  frames/s  mean fitness  best fitness")
+
+    for interval, row in sorted(stats.items(), key=lambda item: int(item[0])):
+        print("{0: >8}  {1: >9}  {2: >4.0f}%  {3: >14.3f} sec  {4: >8.0f}  {5: >12.2f}  {6: >12.1f}".format(
+            interval,
+            row["agent_decisions"],
+            100 * (1 - row["agent_decisions"] / max(base["agent_decisions"], 1)),
+            row["sensing_seconds"] + row["activation_seconds"],
+            row["frames_per_second"],
+            row["mean_fitness"],
+            row["best_fitness"]
+        ))
+
+def run_benchmarks(sizes, frames, repeats, generations, seed, levels, intervals):
+    game = load_game()
+    config = load_config()
+    size = max(sizes)
+
+    # Keep the fitness threshold out of reach so all generations run
+    config.fitness_threshold = float("inf")
+
+    return {
+        "settings": {
+            "sizes": sizes,
+            "frames": frames,
+            "repeats": repeats,
+            "generations": generations,
+            "seed": seed,
+            "levels": levels,
+            "intervals": intervals
+        },
+        "frames_per_second": {
+            str(n): bench_frames(game, config, n, frames, seed) for n in sizes
+        },
+        "solo_frames_per_second": {
+            "frame_loop": bench_solo_frames(game, config, min(sizes), frames, seed, False),
+            "event_driven": bench_solo_frames(game, config, min(sizes), frames, seed, True)
+        },
+        "seconds_per_level_batch": bench_level_batch(game, config, min(sizes), levels, frames, seed),
+        "decision_frames_per_second": dict(
+            (interval, stats["frames_per_second"])
+            for interval, stats in bench_decision_intervals(
+                game, config, max(sizes), intervals, 1, frames, seed
+            ).items()
+        ),
+        "rays_per_second": bench_rays(game, size, repeats, seed),
+        "collisions_per_second": bench_collisions(game, size, repeats, seed),
+        "activations_per_second": bench_activations(config, size, repeats, seed),
+        "sparse_activations_per_second": bench_activations(config, size, repeats, seed, max(1, size // 100)),
+        "seconds_per_generation": bench_generations(game, config, generations, frames, seed)
+    }
+
+# Flatten nested metrics to "name" or "name/size" keys
+def flatten(results):
+    metrics = {}
+
+    for name, value in results.items():
+        if name == "settings":
+            continue
+
+        if isinstance(value, dict):
+            for key, sub_value in value.items():
+                metrics[name + "/" + key] = sub_value
+        else:
+            metrics[name] = value
+
+    return metrics
+
+# Metrics that got worse than the baseline by more than threshold
+def compare(results, baseline, threshold):
+    regressions = []
+    baseline_metrics = flatten(baseline)
+
+    for name, value in flatten(results).items():
+        if name not in baseline_metrics:
+            continue
+
+        reference = baseline_metrics[name]
+
+        if name.split("/")[0] in LOWER_IS_BETTER:
+            change = value / reference - 1
+        else:
+            change = reference / value - 1
+
+        if change > threshold:
+            regressions.append((name, reference, value))
+
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NEAT Doodle Jump benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000], help="population sizes")
+    parser.add_argument("--frames", type=int, default=300, help="frames per simulation run")
+    parser.add_argument("--repeats", type=int, default=100, help="repeats of the sensing, collision and activation benchmarks")
+    parser.add_argument("--generations", type=int, default=3, help="NEAT generations to time")
+    parser.add_argument("--seed", type=int, default=0, help="genome and level seed")
+    parser.add_argument("--output", default=None, help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="compare against this results file")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown against the baseline")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4], help="levels played at once by the level batch benchmark")
+    parser.add_argument("--intervals", type=int, nargs="+", default=[1, 4], help="decision intervals to benchmark and check")
+    parser.add_argument("--check-events", action="store_true", help="check event-driven simulation against the frame loop and exit")
+    parser.add_argument("--check-levels", action="store_true", help="check levels played at once against playing them one by one and exit")
+    parser.add_argument("--decision-report", action="store_true", help="report decisions, sensing and activation time and fitness per decision interval and exit")
+    args = parser.parse_args()
+
+    if args.check_events:
+        game = load_game()
+        config = load_config()
+        config.fitness_threshold = float("inf")
+        mismatches = check_event_driven(game, config, min(args.sizes), 5, args.frames, args.seed, args.intervals)
+        print("{0} mismatches between event-driven and frame loop runs".format(mismatches))
+        sys.exit(1 if mismatches else 0)
+
+    if args.check_levels:
+        game = load_game()
+        config = load_config()
+        config.fitness_threshold = float("inf")
+        mismatches = check_level_batch(game, config, min(args.sizes), max(args.levels), args.frames, args.seed)
+        print("{0} mismatches between levels played at once and one by one".format(mismatches))
+        sys.exit(1 if mismatches else 0)
+
+    if args.decision_report:
+        game = load_game()
+        config = load_config()
+        config.fitness_threshold = float("inf")
+        print_decision_report(bench_decision_intervals(
+            game, config, max(args.sizes), args.intervals, max(args.levels), args.frames, args.seed
+        ))
+        sys.exit(0)
+
+    results = run_benchmarks(
+        args.sizes, args.frames, args.repeats, args.generations, args.seed, args.levels, args.intervals
+    )
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        regressions = compare(results, baseline, args.threshold)
+
+        for name, reference, value in regressions:
+            print("Regression in {0}: {1:.4g} -> {2:.4g}".format(name, reference, value))
+
+        if regressions:
+            sys.exit(1)
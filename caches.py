@@ -0,0 +1,112 @@
+import hashlib
+import numpy as np
+from collections import OrderedDict
+from neat.reporting import BaseReporter
+from networks import compile_genome
+
+# Content hash of the parts of a genome that decide how it plays: its nodes
+# and connections, in the order they are evaluated in. Numbers are hashed
+# as packed floats, which is much faster than formatting them.
+def genome_hash(genome):
+    nodes = genome.nodes
+    connections = genome.connections
+    content = hashlib.blake2b(digest_size=16)
+
+    content.update(np.array([len(nodes), len(connections)], dtype=np.int64).tobytes())
+    content.update(np.array(
+        [(key, ng.bias, ng.response) for key, ng in nodes.items()],
+        dtype=float
+    ).tobytes())
+    content.update(" ".join(ng.activation + ":" + ng.aggregation for ng in nodes.values()).encode())
+    content.update(np.array(
+        [(inode, onode, cg.weight, cg.enabled) for (inode, onode), cg in connections.items()],
+        dtype=float
+    ).tobytes())
+
+    return content.hexdigest()
+
+# LRU Cache
+# Bounded mapping that evicts the least recently used entry, counting hits
+# and misses of its lookups
+class LRUCache:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    # Value of a key, or None
+    def get(self, key):
+        value = self.entries.get(key)
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+# Network Cache
+# Compiled programs of genomes by content hash, so elites and other
+# unchanged genomes are not compiled again every generation
+class NetworkCache(LRUCache):
+    MAX_NETWORKS = 4096
+
+    def __init__(self, capacity=MAX_NETWORKS):
+        LRUCache.__init__(self, capacity)
+
+    def program(self, genome, input_keys, output_keys):
+        key = (genome_hash(genome), tuple(input_keys), tuple(output_keys))
+        program = self.get(key)
+
+        if program is None:
+            program = compile_genome(genome, input_keys, output_keys)
+            self.put(key, program)
+
+        return program
+
+# Fitness Memo
+# Fitness of a genome on a level, by genome hash and level seed. Only valid
+# where a genome plays a level on its own and the episode policy doesn't
+# change, so the result depends on nothing else.
+class FitnessMemo(LRUCache):
+    MAX_ENTRIES = 65536
+
+    def __init__(self, capacity=MAX_ENTRIES):
+        LRUCache.__init__(self, capacity)
+
+# Cache Reporter
+# Reports the hits and misses of caches in every generation
+class CacheReporter(BaseReporter):
+    def __init__(self, caches):
+        self.caches = caches
+        self.counts = {}
+
+    def start_generation(self, generation):
+        self.counts = dict((name, (cache.hits, cache.misses)) for name, cache in self.caches.items())
+
+    def post_evaluate(self, config, population, species, best_genome):
+        for name, cache in self.caches.items():
+            hits, misses = self.counts.get(name, (0, 0))
+            hits = cache.hits - hits
+            misses = cache.misses - misses
+            total = hits + misses
+
+            print("{0}: {1} hits, {2} misses ({3:.1f}% hit rate)".format(
+                name,
+                hits,
+                misses,
+                100 * hits / total if total else 0.0
+            ))
@@ -0,0 +1,83 @@
+import os
+import gzip
+import itertools
+import pickle
+import random
+import threading
+import neat
+
+# Background Checkpointer
+# Saves the population, species, RNG state and level seeds every
+# generation_interval generations or time_interval_seconds, whichever comes
+# first. The state is pickled at the end of the generation, so it is
+# consistent, and then compressed and written by a background thread to a
+# temporary file that is atomically renamed into place.
+class BackgroundCheckpointer(neat.Checkpointer):
+    def __init__(self, evaluator, generation_interval=10, time_interval_seconds=300,
+                 filename_prefix="neat-checkpoint-"):
+        neat.Checkpointer.__init__(self, generation_interval, time_interval_seconds, filename_prefix)
+        self.evaluator = evaluator
+        self.thread = None
+
+    def save_checkpoint(self, config, population, species_set, generation):
+        # Reporters (this one included) belong to the running process
+        reporters = species_set.reporters
+        species_set.reporters = None
+
+        # The population passed in is the one of the next generation
+        try:
+            data = pickle.dumps({
+                "generation": generation + 1,
+                "config": config,
+                "population": population,
+                "species_set": species_set,
+                "random_state": random.getstate(),
+                "level_seed": self.evaluator.seed,
+                "level_generation": self.evaluator.generation
+            }, protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            species_set.reporters = reporters
+
+        filename = "{0}{1}".format(self.filename_prefix, generation)
+        print("Saving checkpoint to {0}".format(filename))
+
+        # Only one write at a time, so checkpoints land in order
+        self.close()
+        self.thread = threading.Thread(target=self.write, args=(filename, data))
+        self.thread.start()
+
+    @staticmethod
+    def write(filename, data):
+        temp_filename = "{0}.{1}.tmp".format(filename, os.getpid())
+
+        with gzip.open(temp_filename, "wb", compresslevel=5) as f:
+            f.write(data)
+
+        os.replace(temp_filename, filename)
+
+    # Wait for the last checkpoint to be written
+    def close(self):
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    # Restores the population and the evaluator's level seeds from a checkpoint
+    @staticmethod
+    def restore_checkpoint(filename, evaluator):
+        with gzip.open(filename) as f:
+            data = pickle.load(f)
+
+        random.setstate(data["random_state"])
+        evaluator.seed = data["level_seed"]
+        evaluator.generation = data["level_generation"]
+
+        p = neat.Population(
+            data["config"],
+            (data["population"], data["species_set"], data["generation"])
+        )
+        p.species.reporters = p.reporters
+
+        # New genomes continue after the newest one, as they would have
+        p.reproduction.genome_indexer = itertools.count(max(p.population) + 1)
+
+        return p
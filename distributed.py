@@ -0,0 +1,201 @@
+import time
+import pickle
+import threading
+import traceback
+from collections import deque
+from multiprocessing.managers import BaseManager
+
+# Job Board
+# Queue of serialized evaluation jobs shared by the coordinator and its
+# workers. A job taken by a worker is leased to it until its result comes
+# back. The coordinator puts jobs whose lease ran out back in the queue, so a
+# lost worker only costs the time of the lease. Whichever result of a job
+# arrives first is kept.
+class JobBoard:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.queue = deque()
+        self.jobs = {}
+        self.leases = {}
+        self.results = {}
+
+    # Add (job id, payload) pairs to the queue
+    def submit(self, jobs):
+        with self.condition:
+            for job_id, payload in jobs:
+                self.jobs[job_id] = payload
+                self.queue.append(job_id)
+
+            self.condition.notify_all()
+
+    # Lease the next job, waiting up to timeout seconds for one. Returns
+    # (job id, payload), or None when there is no work.
+    def take(self, timeout):
+        deadline = time.monotonic() + timeout
+
+        with self.condition:
+            while True:
+                while self.queue:
+                    job_id = self.queue.popleft()
+
+                    # Skip jobs finished since they were requeued
+                    if job_id in self.jobs:
+                        self.leases[job_id] = time.monotonic()
+                        return job_id, self.jobs[job_id]
+
+                remaining = deadline - time.monotonic()
+
+                if remaining <= 0:
+                    return None
+
+                self.condition.wait(remaining)
+
+    # Store the result of a job, unless another worker was first
+    def finish(self, job_id, result, error=None):
+        with self.condition:
+            if job_id not in self.jobs:
+                return
+
+            del self.jobs[job_id]
+            self.leases.pop(job_id, None)
+            self.results[job_id] = (result, error)
+            self.condition.notify_all()
+
+    # Take the results that came in, waiting up to timeout seconds for one
+    def collect(self, timeout):
+        with self.condition:
+            if not self.results:
+                self.condition.wait(timeout)
+
+            results = self.results
+            self.results = {}
+
+            return results
+
+    # Put jobs leased longer than timeout seconds ago back in front of the
+    # queue, returns how many
+    def requeue(self, timeout):
+        now = time.monotonic()
+
+        with self.condition:
+            expired = [job_id for job_id, leased in self.leases.items() if now - leased > timeout]
+
+            for job_id in expired:
+                del self.leases[job_id]
+                self.queue.appendleft(job_id)
+
+            if expired:
+                self.condition.notify_all()
+
+            return len(expired)
+
+# The board is created once in the manager process and shared by every proxy
+JOB_BOARD = None
+
+def job_board():
+    global JOB_BOARD
+
+    if JOB_BOARD is None:
+        JOB_BOARD = JobBoard()
+
+    return JOB_BOARD
+
+class JobManager(BaseManager):
+    pass
+
+JobManager.register("board", callable=job_board)
+
+# Parse "host:port"
+def parse_address(address):
+    host, port = address.rsplit(":", 1)
+
+    return host, int(port)
+
+# Coordinator
+# Serves the job board over TCP and maps jobs over whichever workers are
+# connected to it
+class Coordinator:
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, address, authkey, lease_timeout=120):
+        self.lease_timeout = lease_timeout
+        self.manager = JobManager(address, authkey)
+        self.manager.start()
+        self.address = self.manager.address
+        self.board = self.manager.board()
+        self.next_id = 0
+
+    # Run jobs on the workers, returns their results in order
+    def map(self, jobs):
+        ids = list(range(self.next_id, self.next_id + len(jobs)))
+        self.next_id += len(jobs)
+
+        self.board.submit([
+            (job_id, pickle.dumps(job, protocol=pickle.HIGHEST_PROTOCOL))
+            for job_id, job in zip(ids, jobs)
+        ])
+
+        results = {}
+
+        while len(results) < len(ids):
+            for job_id, (result, error) in self.board.collect(self.POLL_INTERVAL).items():
+                if error is not None:
+                    raise RuntimeError("Job {0} failed on a worker:\n{1}".format(job_id, error))
+
+                results[job_id] = pickle.loads(result)
+
+            requeued = self.board.requeue(self.lease_timeout)
+
+            if requeued:
+                print("Requeued {0} jobs of lost or slow workers".format(requeued))
+
+        return [results[job_id] for job_id in ids]
+
+    def close(self):
+        self.manager.shutdown()
+
+# Connect to a coordinator, retrying for up to timeout seconds while it
+# is not up yet
+def connect(address, authkey, timeout=30):
+    deadline = time.monotonic() + timeout
+
+    while True:
+        manager = JobManager(address, authkey)
+
+        try:
+            manager.connect()
+            return manager
+        except ConnectionError:
+            if time.monotonic() > deadline:
+                raise
+
+            time.sleep(1)
+
+# Worker
+# Takes jobs from a coordinator and runs them with evaluate until the
+# coordinator shuts down
+def work(address, authkey, evaluate, poll_interval=1):
+    board = connect(address, authkey).board()
+
+    while True:
+        try:
+            job = board.take(poll_interval)
+        except (EOFError, ConnectionError):
+            return
+
+        if job is None:
+            continue
+
+        job_id, payload = job
+
+        try:
+            result = pickle.dumps(evaluate(pickle.loads(payload)), protocol=pickle.HIGHEST_PROTOCOL)
+            error = None
+        except Exception:
+            result = None
+            error = traceback.format_exc()
+
+        try:
+            board.finish(job_id, result, error)
+        except (EOFError, ConnectionError):
+            return
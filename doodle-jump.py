@@ -1,16 +1,34 @@
-import pygame
 import neat
 import time
 import os
-import random
 import pickle
-from shapely.geometry import Polygon
-
-pygame.font.init()
+import argparse
+import configparser
+import multiprocessing
+import numpy as np
+from sensors import RaySensor
+from networks import PopulationNetwork
+from levels import LevelGenerator
+from platforms import PlatformBuffer, PlatformBatch
+from checkpoint import BackgroundCheckpointer
+from assets import PLAYER_WIDTH, PLAYER_HEIGHT, PLATFORM_WIDTH, PLATFORM_HEIGHT
+from profiling import FrameProfiler, ProfilingReporter, NULL_PROFILER
+from replay import ReplayRecorder, load_replay, JUMPING, FACING_LEFT
+from distributed import Coordinator, parse_address, work
+from episodes import EpisodePolicy, FULL_EPISODES, episode_policy
+from live import LiveSpectator
+from caches import NetworkCache, FitnessMemo, CacheReporter, genome_hash
+from telemetry import TelemetryReporter
 
 WINDOW_WIDTH = 480
 WINDOW_HEIGHT = 800
 DEBUG_MODE = False
+HEADLESS = False
+SPECTATE = False
+RENDER_EVERY = 4
+RENDER_TOP = 10
+EVENT_DRIVEN = False
+EPISODES = EpisodePolicy()
 FIELD_MARGIN = 5
 COLLISION_MARGIN = 10
 GAP_SIZE = 150
@@ -19,526 +37,845 @@ MAX_STAGNATION = 500
 MAX_PLATFORMS = 7
 MAX_WHILE = 30
 SCROLLING_VELOCITY = 5
+EVENT_HORIZON = 32
+EVENT_BACKOFF = 4
+REPLAY_SEEK = 300
 RAY_WIDTH = 2
 
-PLAYER_SPRITE_RIGHT = pygame.image.load(os.path.join("sprites", "player.png"))
-PLAYER_SPRITE_LEFT = pygame.transform.flip(PLAYER_SPRITE_RIGHT, True, False)
-PLAYER_JUMP_SPRITE_RIGHT = pygame.image.load(os.path.join("sprites", "player_jump.png"))
-PLAYER_JUMP_SPRITE_LEFT = pygame.transform.flip(PLAYER_JUMP_SPRITE_RIGHT, True, False)
-PLATFORM_SPRITE = pygame.image.load(os.path.join("sprites", "platform.png"))
-BG_SPRITE = pygame.image.load(os.path.join("sprites", "bg.png"))
-SCORE_FONT = pygame.font.SysFont("Verdana", 36)
-DEBUG_FONT = pygame.font.SysFont("Verdana", 14)
-
-# Player Class
-class Player:
+# Population State
+# Keeps every player of a generation in NumPy arrays, so that each frame
+# updates the whole population in a few vectorized operations. Players are
+# never removed, dead ones are masked out by `alive`. Each player is in one
+# of a number of independent worlds, with their own platforms and scroll,
+# given by `world`.
+class PopulationState:
     VELOCITY_X = 4
     VELOCITY_Y = 10
     JUMP_VELOCITY = 0.4
     JUMP_POWER = 0.08
     RAY_SIZE = 200
 
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.velocity_x = 0
-        self.velocity_y = 0
-        self.vy = 0
-        self.image = PLAYER_SPRITE_RIGHT
-        self.height = self.image.get_height()
-        self.width = self.image.get_width()
-        self.jump_tick = 0
-        self.jump_animation_timer = 30
-        self.stagnation_timer = 0
-        self.rays = []
-        self.rays_collided = []
-        self.cast_rays()
-
-    # Move Player left
-    def moveLeft(self):
-        self.velocity_x = -self.VELOCITY_X
-
-    # Move Player right
-    def moveRight(self):
-        self.velocity_x = self.VELOCITY_X
-
-    # Jump by setting Y velocity to max
-    def jump(self):
-        self.velocity_y = -self.VELOCITY_Y
-        self.jump_tick = 0
-
-    # Move Player based on X and Y velocity
+    def __init__(self, size, x, y, world=None):
+        self.size = size
+        self.world = np.zeros(size, dtype=np.intp) if world is None else np.asarray(world, dtype=np.intp)
+        self.worlds = int(self.world.max()) + 1 if size else 1
+        self.width = PLAYER_WIDTH
+        self.height = PLAYER_HEIGHT
+        self.x = np.full(size, x, dtype=float)
+        self.y = np.full(size, y, dtype=float)
+        self.velocity_x = np.zeros(size)
+        self.velocity_y = np.zeros(size)
+        self.vy = np.zeros(size)
+        self.jump_tick = np.zeros(size)
+        self.stagnation_timer = np.zeros(size, dtype=int)
+        self.fitness = np.zeros(size)
+        self.alive = np.ones(size, dtype=bool)
+        self.rays_collided = np.zeros((size, len(RAY_SENSOR.polygons)), dtype=np.int8)
+        self.inputs = np.zeros((size, len(RAY_SENSOR.polygons) + 4))
+        self.action = np.zeros(size, dtype=np.intp)
+        self.observed = None
+
+        # Progress of each player: the highest point it reached, and how
+        # many times it landed since
+        self.best_height = np.full(size, -np.inf)
+        self.idle_jumps = np.zeros(size, dtype=int)
+
+    # Indices of living players
+    def living(self):
+        return np.flatnonzero(self.alive)
+
+    # Move Players based on X and Y velocity
     def move(self):
         self.jump_tick += self.JUMP_VELOCITY
 
-        vy = self.velocity_y + self.JUMP_POWER * self.jump_tick ** 2
+        vy = np.minimum(
+            self.velocity_y + self.JUMP_POWER * self.jump_tick ** 2,
+            self.VELOCITY_Y
+        )
+        vy[vy < 0] -= 2
 
-        if vy >= self.VELOCITY_Y:
-            vy = self.VELOCITY_Y
+        self.vy = vy
+        self.y += vy
+        self.x += self.velocity_x
 
-        if vy < 0:
-            vy -= 2
+        # Place Players on opposite wall when crossing window
+        self.x[self.x < 0 - (self.width / 2)] = WINDOW_WIDTH
+        self.x[self.x > WINDOW_WIDTH - (self.width / 2)] = 0 - (self.width / 2)
 
-        self.vy = vy
-        self.y = self.y + vy
-        self.x = self.x + self.velocity_x
+    # Cast rays of the given players, returns their neural network inputs
+    def sense(self, index, platforms):
+        observed = self.observed
+        self.observed = None
 
-        # Jump animation
-        if self.jump_tick < 7:
-            if self.velocity_x >= 0:
-                self.image = PLAYER_JUMP_SPRITE_RIGHT
-            else:
-                self.image = PLAYER_JUMP_SPRITE_LEFT
+        # skip() may already have cast the rays of this frame
+        if observed is not None and np.array_equal(observed[0], index):
+            _, rays, inputs = observed
         else:
-            if self.velocity_x >= 0:
-                self.image = PLAYER_SPRITE_RIGHT
-            else:
-                self.image = PLAYER_SPRITE_LEFT
-
-        # Place Player on opposite wall when crossing window
-        if self.x < 0 - (self.width / 2):
-            self.x = WINDOW_WIDTH
-
-        if self.x > WINDOW_WIDTH - (self.width / 2):
-            self.x = 0 - (self.width / 2)
-
-    # Draw Player
-    def draw(self, win):
-        win.blit(self.image, (self.x, self.y))
-        self.cast_rays()
-
-        # In Debug Mode, draw visible collision and coordinates
-        if DEBUG_MODE:
-            win.blit(
-                DEBUG_FONT.render(
-                    "Y: " + str(round(self.y)) + "; X: " + str(round(self.x)),
-                    1,
-                    (0, 0, 0)
-                ),
-                (self.x, self.y)
+            rays, inputs = self.observe(
+                self.x[index],
+                self.y[index],
+                self.vy[index],
+                self.velocity_x[index],
+                self.world[index],
+                platforms
             )
 
-            surface = pygame.Surface((self.width / 2, COLLISION_MARGIN))
-            surface.set_alpha(128)
-            surface.fill((0, 35, 255))
-            win.blit(surface, (self.x + (self.width / 4), self.y + self.height))
-
-            for i, rays in enumerate(self.rays):
-                for ray in rays:
-                    color = (75, 50, 255)
-
-                    if self.rays_collided and 0 <= i < len(self.rays_collided) and self.rays_collided[i] == 1:
-                        color = (35, 255, 0)
-
-                    pygame.draw.polygon(win, color, ray.exterior.coords, 2)
-
-    # Cast rays to detect platforms
-    def cast_rays(self):
-        self.rays = [
-            # Left
-            [Polygon([
-                (self.x - self.RAY_SIZE, self.y + (self.height / 2)),
-                (self.x - self.RAY_SIZE, self.y + (self.height / 2) + RAY_WIDTH),
-                (self.x + (self.width / 2), self.y + (self.height / 2) + RAY_WIDTH),
-                (self.x + (self.width / 2), self.y + (self.height / 2))
-            ])],
-            # Left left top
-            [Polygon([
-                (self.x - (self.RAY_SIZE * 0.85), self.y + (self.height / 2) - (self.RAY_SIZE * 0.65)),
-                (self.x - (self.RAY_SIZE * 0.85), self.y + (self.height / 2) - (self.RAY_SIZE * 0.65) - RAY_WIDTH),
-                (self.x + (self.width / 2), self.y + (self.height / 2) + RAY_WIDTH),
-                (self.x + (self.width / 2), self.y + (self.height / 2))
-            ])],
-            # Left top top
-            [Polygon([
-                (self.x - (self.RAY_SIZE * 0.15), self.y - (self.RAY_SIZE * 0.85)),
-                (self.x - (self.RAY_SIZE * 0.15) - RAY_WIDTH, self.y - (self.RAY_SIZE * 0.85)),
-                (self.x + (self.width / 2), self.y + (self.height / 2) + RAY_WIDTH),
-                (self.x + (self.width / 2), self.y + (self.height / 2))
-            ])],
-            # Top
-            [Polygon([
-                (self.x + (self.width / 2) - (RAY_WIDTH / 2), self.y - self.RAY_SIZE),
-                (self.x + (self.width / 2) - (RAY_WIDTH / 2), self.y + (self.height / 2)),
-                (self.x + (self.width / 2) + (RAY_WIDTH / 2), self.y + (self.height / 2)),
-                (self.x + (self.width / 2) + (RAY_WIDTH / 2), self.y - self.RAY_SIZE)
-            ])],
-            # Top top right
-            [Polygon([
-                (self.x + self.width + (self.RAY_SIZE * 0.15), self.y - (self.RAY_SIZE * 0.85)),
-                (self.x + self.width + (self.RAY_SIZE * 0.15) - RAY_WIDTH, self.y - (self.RAY_SIZE * 0.85)),
-                (self.x + (self.width / 2), self.y + (self.height / 2) + RAY_WIDTH),
-                (self.x + (self.width / 2), self.y + (self.height / 2))
-            ])],
-            # Top right right
-            [Polygon([
-                (self.x + self.width + (self.RAY_SIZE * 0.85), self.y + (self.height / 2) - (self.RAY_SIZE * 0.65)),
-                (self.x + self.width + (self.RAY_SIZE * 0.85), self.y + (self.height / 2) - (self.RAY_SIZE * 0.65) - RAY_WIDTH),
-                (self.x + (self.width / 2), self.y + (self.height / 2) + RAY_WIDTH),
-                (self.x + (self.width / 2), self.y + (self.height / 2))
-            ])],
-            # Right
-            [Polygon([
-                (self.x + self.width + self.RAY_SIZE, self.y + (self.height / 2)),
-                (self.x + self.width + self.RAY_SIZE, self.y + (self.height / 2) + RAY_WIDTH),
-                (self.x + (self.width / 2), self.y + (self.height / 2) + RAY_WIDTH),
-                (self.x + (self.width / 2), self.y + (self.height / 2))
-            ])],
-            # Bottom left left
-            [Polygon([
-                (self.x - (self.RAY_SIZE * 0.85), self.y + (self.height / 2) + (self.RAY_SIZE * 0.65)),
-                (self.x - (self.RAY_SIZE * 0.85), self.y + (self.height / 2) + (self.RAY_SIZE * 0.65) - RAY_WIDTH),
-                (self.x + (self.width / 2), self.y + (self.height / 2) + RAY_WIDTH),
-                (self.x + (self.width / 2), self.y + (self.height / 2))
-            ])],
-            # Bottom bottom left
-            [Polygon([
-                (self.x - (self.RAY_SIZE * 0.15), self.y + self.height + (self.RAY_SIZE * 0.85)),
-                (self.x - (self.RAY_SIZE * 0.15) - RAY_WIDTH, self.y + self.height + (self.RAY_SIZE * 0.85)),
-                (self.x + (self.width / 2), self.y + (self.height / 2) + RAY_WIDTH),
-                (self.x + (self.width / 2), self.y + (self.height / 2))
-            ])],
-            # Bottom
-            [Polygon([
-                (self.x + (self.width / 2) - (RAY_WIDTH / 2), self.y + self.height + self.RAY_SIZE),
-                (self.x + (self.width / 2) - (RAY_WIDTH / 2), self.y + (self.height / 2)),
-                (self.x + (self.width / 2) + (RAY_WIDTH / 2), self.y + (self.height / 2)),
-                (self.x + (self.width / 2) + (RAY_WIDTH / 2), self.y + self.height + self.RAY_SIZE)
-            ])],
-            # Bottom bottom right
-            [Polygon([
-                (self.x + self.width + (self.RAY_SIZE * 0.15), self.y + self.height + (self.RAY_SIZE * 0.85)),
-                (self.x + self.width + (self.RAY_SIZE * 0.15) - RAY_WIDTH, self.y + self.height + (self.RAY_SIZE * 0.85)),
-                (self.x + (self.width / 2), self.y + (self.height / 2) + RAY_WIDTH),
-                (self.x + (self.width / 2), self.y + (self.height / 2))
-            ])],
-            # Bottom right right
-            [Polygon([
-                (self.x + self.width + (self.RAY_SIZE * 0.85), self.y + (self.height / 2) + (self.RAY_SIZE * 0.65)),
-                (self.x + self.width + (self.RAY_SIZE * 0.85), self.y + (self.height / 2) + (self.RAY_SIZE * 0.65) - RAY_WIDTH),
-                (self.x + (self.width / 2), self.y + (self.height / 2) + RAY_WIDTH),
-                (self.x + (self.width / 2), self.y + (self.height / 2))
-            ])]
-        ]
-
-        # Mirror rays when crossing window borders
-        if self.x < self.RAY_SIZE:
-            self.rays[0].append(Polygon([
-                (WINDOW_WIDTH + self.x - self.RAY_SIZE, self.y + (self.height / 2)),
-                (WINDOW_WIDTH + self.x - self.RAY_SIZE, self.y + (self.height / 2) + RAY_WIDTH),
-                (WINDOW_WIDTH + self.x + (self.width / 2), self.y + (self.height / 2) + RAY_WIDTH),
-                (WINDOW_WIDTH + self.x + (self.width / 2), self.y + (self.height / 2))
-            ]))
-            self.rays[1].append(Polygon([
-                (WINDOW_WIDTH + self.x - (self.RAY_SIZE * 0.85), self.y + (self.height / 2) - (self.RAY_SIZE * 0.65)),
-                (WINDOW_WIDTH + self.x - (self.RAY_SIZE * 0.85), self.y + (self.height / 2) - (self.RAY_SIZE * 0.65) - RAY_WIDTH),
-                (WINDOW_WIDTH + self.x + (self.width / 2), self.y + (self.height / 2) + RAY_WIDTH),
-                (WINDOW_WIDTH + self.x + (self.width / 2), self.y + (self.height / 2))
-            ]))
-            self.rays[2].append(Polygon([
-                (WINDOW_WIDTH + self.x - (self.RAY_SIZE * 0.15), self.y - (self.RAY_SIZE * 0.85)),
-                (WINDOW_WIDTH + self.x - (self.RAY_SIZE * 0.15) - RAY_WIDTH, self.y - (self.RAY_SIZE * 0.85)),
-                (WINDOW_WIDTH + self.x + (self.width / 2), self.y + (self.height / 2) + RAY_WIDTH),
-                (WINDOW_WIDTH + self.x + (self.width / 2), self.y + (self.height / 2))
-            ]))
-            self.rays[7].append(Polygon([
-                (WINDOW_WIDTH + self.x - (self.RAY_SIZE * 0.85), self.y + (self.height / 2) + (self.RAY_SIZE * 0.65)),
-                (WINDOW_WIDTH + self.x - (self.RAY_SIZE * 0.85), self.y + (self.height / 2) + (self.RAY_SIZE * 0.65) - RAY_WIDTH),
-                (WINDOW_WIDTH + self.x + (self.width / 2), self.y + (self.height / 2) + RAY_WIDTH),
-                (WINDOW_WIDTH + self.x + (self.width / 2), self.y + (self.height / 2))
-            ]))
-            self.rays[8].append(Polygon([
-                (WINDOW_WIDTH + self.x - (self.RAY_SIZE * 0.15), self.y + self.height + (self.RAY_SIZE * 0.85)),
-                (WINDOW_WIDTH + self.x - (self.RAY_SIZE * 0.15) - RAY_WIDTH, self.y + self.height + (self.RAY_SIZE * 0.85)),
-                (WINDOW_WIDTH + self.x + (self.width / 2), self.y + (self.height / 2) + RAY_WIDTH),
-                (WINDOW_WIDTH + self.x + (self.width / 2), self.y + (self.height / 2))
-            ]))
-        elif self.x + self.width > WINDOW_WIDTH - self.RAY_SIZE:
-            self.rays[4].append(Polygon([
-                (self.x + self.width + (self.RAY_SIZE * 0.15) - WINDOW_WIDTH, self.y - (self.RAY_SIZE * 0.85)),
-                (self.x + self.width + (self.RAY_SIZE * 0.15) - RAY_WIDTH - WINDOW_WIDTH, self.y - (self.RAY_SIZE * 0.85)),
-                (self.x + (self.width / 2) - WINDOW_WIDTH, self.y + (self.height / 2) + RAY_WIDTH),
-                (self.x + (self.width / 2) - WINDOW_WIDTH, self.y + (self.height / 2))
-            ]))
-            self.rays[5].append(Polygon([
-                (self.x + self.width + (self.RAY_SIZE * 0.85) - WINDOW_WIDTH, self.y + (self.height / 2) - (self.RAY_SIZE * 0.65)),
-                (self.x + self.width + (self.RAY_SIZE * 0.85) - WINDOW_WIDTH, self.y + (self.height / 2) - (self.RAY_SIZE * 0.65) - RAY_WIDTH),
-                (self.x + (self.width / 2) - WINDOW_WIDTH, self.y + (self.height / 2) + RAY_WIDTH),
-                (self.x + (self.width / 2) - WINDOW_WIDTH, self.y + (self.height / 2))
-            ]))
-            self.rays[6].append(Polygon([
-                (self.x + self.width + self.RAY_SIZE - WINDOW_WIDTH, self.y + (self.height / 2)),
-                (self.x + self.width + self.RAY_SIZE - WINDOW_WIDTH, self.y + (self.height / 2) + RAY_WIDTH),
-                (self.x + (self.width / 2) - WINDOW_WIDTH, self.y + (self.height / 2) + RAY_WIDTH),
-                (self.x + (self.width / 2) - WINDOW_WIDTH, self.y + (self.height / 2))
-            ]))
-            self.rays[10].append(Polygon([
-                (self.x + self.width + (self.RAY_SIZE * 0.15) - WINDOW_WIDTH, self.y + self.height + (self.RAY_SIZE * 0.85)),
-                (self.x + self.width + (self.RAY_SIZE * 0.15) - RAY_WIDTH - WINDOW_WIDTH, self.y + self.height + (self.RAY_SIZE * 0.85)),
-                (self.x + (self.width / 2) - WINDOW_WIDTH, self.y + (self.height / 2) + RAY_WIDTH),
-                (self.x + (self.width / 2) - WINDOW_WIDTH, self.y + (self.height / 2))
-            ]))
-            self.rays[11].append(Polygon([
-                (self.x + self.width + (self.RAY_SIZE * 0.85) - WINDOW_WIDTH, self.y + (self.height / 2) + (self.RAY_SIZE * 0.65)),
-                (self.x + self.width + (self.RAY_SIZE * 0.85) - WINDOW_WIDTH, self.y + (self.height / 2) + (self.RAY_SIZE * 0.65) - RAY_WIDTH),
-                (self.x + (self.width / 2) - WINDOW_WIDTH, self.y + (self.height / 2) + RAY_WIDTH),
-                (self.x + (self.width / 2) - WINDOW_WIDTH, self.y + (self.height / 2))
-            ]))
-
-    # Check collision
-    def collide(self, platforms):
-        player_rect = pygame.Rect(
-            self.x + (self.width / 4),
-            self.y + self.height,
-            self.width / 2,
-            COLLISION_MARGIN
+        self.rays_collided[index] = rays
+        self.inputs[index] = inputs
+
+        return inputs
+
+    # Ray hits and neural network inputs of players at the given positions
+    # and velocities, in the given worlds
+    @staticmethod
+    def observe(xs, ys, vy, velocity_x, worlds, platforms):
+        # Only platforms within reach of each player's rays
+        boxes, valid = platforms.query(worlds, ys + RAY_SENSOR.top, ys + RAY_SENSOR.bottom)
+        rays = RAY_SENSOR.detect(xs, ys, boxes, valid)
+
+        return rays, np.column_stack((
+            rays,
+            vy > 0,
+            vy < 0,
+            velocity_x > 0,
+            velocity_x < 0
+        )).astype(float)
+
+    # Move the given Players left (action 0) or right (action 1)
+    def steer(self, index, actions):
+        self.action[index] = actions
+        self.velocity_x[index[actions == 0]] = -self.VELOCITY_X
+        self.velocity_x[index[actions == 1]] = self.VELOCITY_X
+
+    # Keep Players below the Jump Threshold, returns how far each world
+    # should scroll for the fastest of its Players
+    def clamp(self):
+        above = self.alive & (self.y <= JUMP_THRESHOLD)
+        self.y[above] = JUMP_THRESHOLD
+        scroll = np.zeros(self.worlds, dtype=int)
+
+        if above.any():
+            np.maximum.at(scroll, self.world[above], -np.round(self.vy[above]).astype(int))
+
+        return scroll
+
+    # Let living Players jump off platforms they land on
+    def land(self, platforms):
+        collided = self.collisions(self.x, self.y, self.world, platforms) & self.alive
+
+        # Jump by setting Y velocity to max
+        self.velocity_y[collided] = -self.VELOCITY_Y
+        self.jump_tick[collided] = 0
+
+        return collided
+
+    # Whether the feet of players at the given positions, in the given
+    # worlds, touch a platform
+    def collisions(self, xs, ys, worlds, platforms):
+        # Same truncation and overlap rules as pygame.Rect.colliderect
+        left = np.trunc(xs + (self.width / 4))[:, None]
+        top = np.trunc(ys + self.height)[:, None]
+        width = int(self.width / 2)
+
+        # Only platforms around each player's feet
+        boxes, valid = platforms.query(worlds, top[:, 0] - 1, top[:, 0] + COLLISION_MARGIN + 1)
+        platform_left = np.trunc(boxes[..., 0])
+        platform_top = np.trunc(boxes[..., 1])
+        platform_width = np.trunc(boxes[..., 2])
+        platform_height = np.trunc(boxes[..., 3])
+
+        return (
+            valid &
+            (left < platform_left + platform_width) &
+            (platform_left < left + width) &
+            (top < platform_top + platform_height) &
+            (platform_top < top + COLLISION_MARGIN)
+        ).any(axis=1)
+
+    # Reward living Players while their world scrolls, and remove the ones
+    # that fell out of the window or stagnated for too long
+    def update(self, current_height):
+        self.alive &= self.y < WINDOW_HEIGHT
+        scrolling = (current_height > 1)[self.world]
+
+        self.fitness[self.alive & scrolling] += 0.1
+        self.stagnation_timer[self.alive & scrolling] = 0
+        self.stagnation_timer[self.alive & ~scrolling] += 1
+
+        self.alive &= self.stagnation_timer <= MAX_STAGNATION
+
+    # Track the progress of living Players, given the collisions of this
+    # frame and how far each world scrolled in total
+    def track(self, collided, score):
+        height = score[self.world] + WINDOW_HEIGHT - self.y
+        improved = self.alive & (height > self.best_height)
+        self.best_height[improved] = height[improved]
+        self.idle_jumps[improved] = 0
+
+        # Players keep touching a platform for a few frames after a jump,
+        # only count landings while falling
+        self.idle_jumps[collided & (self.vy > 0)] += 1
+
+    # Play up to horizon frames of all living Players at once, as long as
+    # nothing happens in them that the frame loop has to handle: no network
+    # input changes on the decision frames among them, so no action does,
+    # and no Player lands, wraps around, reaches the Jump Threshold or dies.
+    # The arcs are integrated with the same operations in the same order as
+    # move(), so the result is the same. Returns the number of frames played.
+    def skip(self, platforms, horizon, score, decisions):
+        index = self.living()
+        worlds = self.world[index]
+        n = len(index)
+
+        # Arcs of the next frames, accumulated like move() does frame by frame
+        jump_tick = np.add.accumulate(np.column_stack((
+            self.jump_tick[index],
+            np.full((n, horizon), self.JUMP_VELOCITY)
+        )), axis=1)[:, 1:]
+        vy = np.minimum(
+            self.velocity_y[index, None] + self.JUMP_POWER * jump_tick ** 2,
+            self.VELOCITY_Y
+        )
+        vy[vy < 0] -= 2
+        ys = np.add.accumulate(np.column_stack((self.y[index], vy)), axis=1)[:, 1:]
+        x = self.x[index]
+        velocity_x = self.velocity_x[index]
+        xs = np.add.accumulate(np.column_stack((
+            x,
+            np.repeat(velocity_x[:, None], horizon, axis=1)
+        )), axis=1)[:, 1:]
+
+        # Players walking into the left wall wrap back onto it every frame
+        pinned = (x == 0 - (self.width / 2)) & (velocity_x < 0)
+        xs[pinned] = x[pinned, None]
+
+        # Cheap events first, the rays are only cast up to the first of them
+        events = (
+            (~pinned[:, None] & (xs < 0 - (self.width / 2))) |
+            (xs > WINDOW_WIDTH - (self.width / 2)) |
+            (ys <= JUMP_THRESHOLD) |
+            (ys >= WINDOW_HEIGHT) |
+            (self.stagnation_timer[index, None] + np.arange(1, horizon + 1) > MAX_STAGNATION)
         )
+        frames = self.quiet_frames(events)
+
+        if frames > 0:
+            events = self.collisions(
+                xs[:, :frames].ravel(),
+                ys[:, :frames].ravel(),
+                np.repeat(worlds, frames),
+                platforms
+            ).reshape(n, frames)
+            frames = self.quiet_frames(events)
+
+        # Only decision frames read the network inputs, so rays are cast
+        # just for them
+        columns = np.flatnonzero(decisions[:frames])
+
+        if len(columns) > 0:
+            observed = len(columns)
+            rays, inputs = self.observe(
+                xs[:, columns].ravel(),
+                ys[:, columns].ravel(),
+                vy[:, columns].ravel(),
+                np.repeat(velocity_x, observed),
+                np.repeat(worlds, observed),
+                platforms
+            )
+            rays = rays.reshape(n, observed, -1)
+            inputs = inputs.reshape(n, observed, -1)
+            changed = self.quiet_frames((inputs != self.inputs[index, None]).any(axis=2))
+
+            # The frame that ends the skip starts where it was predicted to,
+            # so it can use the rays already cast there
+            if changed < observed:
+                frames = int(columns[changed])
+                self.observed = (index, rays[:, changed], inputs[:, changed])
+
+        if frames == 0:
+            return 0
+
+        last = frames - 1
+        self.jump_tick[index] = jump_tick[:, last]
+        self.vy[index] = vy[:, last]
+        self.y[index] = ys[:, last]
+        self.x[index] = xs[:, last]
+        self.stagnation_timer[index] += frames
+
+        height = (score[worlds, None] + WINDOW_HEIGHT - ys[:, :frames]).max(axis=1)
+        improved = height > self.best_height[index]
+        self.best_height[index[improved]] = height[improved]
+        self.idle_jumps[index[improved]] = 0
+
+        return frames
+
+    # Number of frames before the first event of any Player
+    @staticmethod
+    def quiet_frames(events):
+        first = events.any(axis=0)
+
+        return int(np.argmax(first)) if first.any() else events.shape[1]
+
+
+# Ray sensor shared by all players
+RAY_SENSOR = RaySensor(
+    PLAYER_WIDTH,
+    PLAYER_HEIGHT,
+    WINDOW_WIDTH,
+    PopulationState.RAY_SIZE,
+    RAY_WIDTH
+)
+
+# Seeded platform streams, shared by every simulation in this process
+LEVELS = LevelGenerator(
+    FIELD_MARGIN,
+    WINDOW_WIDTH - PLATFORM_WIDTH - FIELD_MARGIN
+)
+
+# Compiled genome programs, shared by every simulation in this process
+NETWORKS = NetworkCache()
+
+# Generate initial Platforms
+def generateInitialPlatforms(level):
+    prev_y = FIELD_MARGIN
+    initial = []
+
+    # Make sure each platform has enough vertical spacing
+    for i in range(MAX_PLATFORMS):
+        x = level.x(i)
+        y = prev_y + GAP_SIZE
+        prev_y = y
 
-        for platform in platforms:
-            platform_rect = pygame.Rect(
-                platform.x,
-                platform.y,
-                platform.width,
-                platform.height
+        initial.append((i, x, y))
+
+    platforms = PlatformBuffer(
+        MAX_PLATFORMS,
+        PLATFORM_WIDTH,
+        PLATFORM_HEIGHT
+    )
+
+    # The buffer is filled bottom to top
+    for i, x, y in reversed(initial):
+        platforms.push(i, x, y)
+
+    return platforms
+
+# Replace Platforms below the window with new ones above it, returns the id
+# of the next platform
+def refreshPlatforms(platforms, level, platform_i):
+    while len(platforms) and platforms.bottom() > WINDOW_HEIGHT:
+        platforms.pop()
+        platforms.push(platform_i, level.x(platform_i), -platforms.height)
+        platform_i += 1
+
+    return platform_i
+
+# Replace Platforms below the window with new ones above it in every world
+# of a batch, given the level and the id of the next platform of each world
+def refreshPlatformBatch(platforms, levels, platform_i):
+    worlds = np.flatnonzero(platforms.bottom() > WINDOW_HEIGHT)
+
+    while len(worlds):
+        xs = [levels[world].x(platform_i[world]) for world in worlds]
+        platforms.replace(worlds, platform_i[worlds], xs, -platforms.height)
+        platform_i[worlds] += 1
+        worlds = worlds[platforms.bottom()[worlds] > WINDOW_HEIGHT]
+
+# Combine the fitnesses of every genome on its levels, given as a
+# (levels, genomes) array: their mean, their minimum or a quantile
+def aggregate_fitness(fitnesses, aggregate="mean"):
+    if aggregate == "mean":
+        return fitnesses.mean(axis=0)
+
+    if aggregate == "min":
+        return fitnesses.min(axis=0)
+
+    return np.quantile(fitnesses, float(aggregate), axis=0)
+
+# Raise ValueError for an aggregate aggregate_fitness doesn't know
+def check_aggregate(aggregate):
+    if aggregate in ("mean", "min"):
+        return
+
+    try:
+        quantile = float(aggregate)
+    except ValueError:
+        quantile = -1
+
+    if not 0 <= quantile <= 1:
+        raise ValueError("--aggregate must be mean, min or a quantile between 0 and 1")
+
+# Simulate a group of genomes on one or more levels at once until the
+# episode policy ends them, returns the number of frames simulated. Every
+# level is a world of its own that the whole group plays together, or with
+# solo, every genome plays every level in a world of its own. Either way
+# all players of all worlds are stepped together, laid out levels by
+# genomes, and a genome's fitness is the aggregate of its levels. A live
+# spectator is shown the first world. Networks pick an action every
+# decision_interval frames, which players keep in between.
+def simulate(genomes, config, levels, headless=False, policy=FULL_EPISODES, profiler=NULL_PROFILER,
+             recorder=None, event_driven=False, solo=False, aggregate="mean", spectator=None,
+             decision_interval=1):
+    frame, fitnesses, _ = simulate_levels(
+        genomes, config, levels, headless, policy, profiler, recorder, event_driven, solo, spectator,
+        decision_interval
+    )
+    assign_fitness(genomes, fitnesses, aggregate)
+
+    return frame
+
+# Set the fitness of genomes to the aggregate of their fitnesses on each
+# level, a (levels, genomes) array
+def assign_fitness(genomes, fitnesses, aggregate="mean"):
+    for (_, g), fitness in zip(genomes, aggregate_fitness(fitnesses, aggregate)):
+        g.fitness = float(fitness)
+
+# Simulate like simulate() does, returns the number of frames simulated,
+# the fitnesses of the genomes on each level, a (levels, genomes) array, and
+# how far each world scrolled
+def simulate_levels(genomes, config, levels, headless=False, policy=FULL_EPISODES, profiler=NULL_PROFILER,
+                    recorder=None, event_driven=False, solo=False, spectator=None, decision_interval=1):
+    ge = []
+
+    for _, g in genomes:
+        g.fitness = 0
+        ge.append(g)
+
+    size = len(ge) * len(levels)
+
+    # Every player of a world follows its own copy of a genome's network
+    if solo:
+        world = np.arange(size)
+        world_levels = [level for level in levels for _ in ge]
+    else:
+        world = np.repeat(np.arange(len(levels)), len(ge))
+        world_levels = levels
+
+    if not headless and len(world_levels) > 1:
+        raise ValueError("Only a single world can be rendered")
+
+    # Set Neural Networks, compiled for the whole population at once
+    network = PopulationNetwork(ge * len(levels), config, NETWORKS)
+
+    state = PopulationState(size, 200, 200, world)
+
+    # Headless runs skip the window, the frame cap and all blits, and never
+    # import pygame or load assets
+    if not headless:
+        from renderer import Renderer, SpectatorRenderer
+
+        if SPECTATE:
+            renderer = SpectatorRenderer(
+                WINDOW_WIDTH,
+                WINDOW_HEIGHT,
+                RAY_SENSOR,
+                COLLISION_MARGIN,
+                DEBUG_MODE,
+                RENDER_EVERY,
+                RENDER_TOP
             )
-            self.prev_platform = platform.id
+        else:
+            renderer = Renderer(WINDOW_WIDTH, WINDOW_HEIGHT, RAY_SENSOR, COLLISION_MARGIN, DEBUG_MODE)
 
-            if player_rect.colliderect(platform_rect):
-                return True
+    # Stopping a level early would skew the aggregate of the others
+    stop_fitness = policy.stop_fitness(config) if len(levels) == 1 else None
 
-        return False
+    platforms = PlatformBatch([generateInitialPlatforms(level) for level in world_levels])
+    platform_i = np.full(len(world_levels), MAX_PLATFORMS, dtype=np.int64)
+    current_height = np.zeros(len(world_levels), dtype=int)
+    run = True
+    score = np.zeros(len(world_levels), dtype=np.int64)
+    frame = 0
 
-    # Detect platform when intersected with cast ray
-    def detect_platform(self, platforms):
-        self.rays_collided = []
+    if recorder is not None:
+        recorder.begin(
+            [key for _ in levels for key, _ in genomes],
+            [level.seed for level in levels for _ in genomes]
+        )
+
+    # Frames can only be skipped when nobody watches or records them
+    event_driven = event_driven and headless and recorder is None
+    horizon = EVENT_HORIZON
+    backoff = 0
+    wait = 0
+
+    while run:
+        if not headless:
+            renderer.tick()
+
+        # Stop Generation when there are no players left, or none that
+        # can still gain fitness. Worlds that are over before the others
+        # lose their players.
+        finished = policy.finished(frame, state, stop_fitness)
+
+        if finished.all():
+            break
+
+        state.alive &= ~finished[state.world]
+
+        profiler.begin_frame()
+
+        # Play the frames in which nothing happens at once, up to the next
+        # frame that needs the network or the platforms
+        if event_driven and frame > 0 and wait == 0:
+            if policy.max_frames is not None:
+                horizon = min(horizon, policy.max_frames - frame)
+
+            decisions = np.arange(frame, frame + horizon) % decision_interval == 0
+            skipped = state.skip(platforms, horizon, score, decisions)
+            frame += skipped
+            profiler.lap("events")
+
+            # Look further ahead after quiet stretches, and back off
+            # after busy ones, where looking ahead costs more than it saves
+            horizon = min(EVENT_HORIZON, max(2, 2 * skipped))
+            backoff = 0 if skipped else min(EVENT_HORIZON, 2 * backoff + 1)
+            wait = backoff
+
+            finished = policy.finished(frame, state, stop_fitness)
+
+            if finished.all():
+                break
+
+            state.alive &= ~finished[state.world]
+        elif wait:
+            wait -= 1
+
+        frame += 1
+
+        # Refresh Platforms, reusing the slots of the ones below the window
+        refreshPlatformBatch(platforms, world_levels, platform_i)
+
+        profiler.lap("platforms")
+
+        state.move()
+        profiler.lap("movement")
 
-        if self.rays:
-            for rays in self.rays:
-                cast = False
+        # Determine action based on input on decision frames, in between
+        # players keep moving the way they chose last
+        index = state.living()
+        decide = (frame - 1) % decision_interval == 0
 
-                for i, platform in enumerate(platforms):
-                    for ray in rays:
-                        if platform.polygon and ray.intersects(platform.polygon) and not cast:
-                            self.rays_collided.append(1)
-                            cast = True
+        if decide:
+            input_data = state.sense(index, platforms)
+            profiler.lap("sensing")
 
-                if not cast:
-                    self.rays_collided.append(0)
+            actions = network.actions(index, input_data)
+            profiler.lap("activation")
+
+            # Move Players based on Neural Network Output
+            state.steer(index, actions)
         else:
-            self.rays_collided = [0, 0, 0, 0, 0, 0, 0]
+            actions = state.action[index]
+
+        # Move Platforms if Player Y is above Jump Threshold
+        current_height = state.clamp()
+        profiler.lap("movement")
 
-            return self.rays_collided
+        # Check Player - Platform Collision
+        collided = state.land(platforms)
+        profiler.lap("collision")
 
-        return self.rays_collided
+        # Player Death, fitness and stagnation
+        state.update(current_height)
 
+        current_height = np.minimum(current_height, SCROLLING_VELOCITY)
+        score += current_height
 
-# Platform Class
-class Platform:
-    VELOCITY = 5
+        # Move platforms when Player reaches above Jump Threshold
+        platforms.move(current_height)
+
+        # Per-player progress, and removal of the ones that stalled
+        state.track(collided, score)
+        policy.cull(state)
+        profiler.lap("fitness")
+
+        if recorder is not None:
+            recorder.record(index, actions, state, current_height[state.world[index]])
+
+        if spectator is not None:
+            spectator.publish(state, platforms, score)
+
+        if not headless:
+            renderer.draw(state, platforms, int(score[0]))
+            profiler.lap("render")
+
+        profiler.end_frame(len(index), len(index) if decide else 0)
+
+    if recorder is not None:
+        recorder.end(state.fitness)
+
+    return frame, state.fitness.reshape(len(levels), len(ge)), score
+
+# Set by pool workers once a genome of the generation reached the fitness
+# threshold, so the others skip the genomes they have left
+STOP_EVENT = None
+
+def init_worker(stop_event):
+    global STOP_EVENT
+    STOP_EVENT = stop_event
+
+# Evaluate a chunk of genomes in a worker process. Every genome plays each
+# of the seeded levels on its own, all of them at once. Returns the
+# fitnesses of the genomes on each level, or None when the generation was
+# stopped, the phase stats, and counts of the frames simulated, the best
+# score and the network cache hits and misses.
+def evaluate_genomes(job):
+    genomes, config, seeds, policy, profile, aggregate, record_dir, decision_interval = job
+    hits, misses = NETWORKS.hits, NETWORKS.misses
+    counts = {"frames": 0, "score": 0, "network_hits": 0, "network_misses": 0}
+
+    # NEAT stops after this generation, the rest don't need a fitness
+    if STOP_EVENT is not None and STOP_EVENT.is_set():
+        return None, None, counts
+
+    profiler = FrameProfiler() if profile else NULL_PROFILER
+    recorder = ReplayRecorder(record_dir) if record_dir else None
+
+    frames, fitnesses, scores = simulate_levels(
+        [(genome.key, genome) for genome in genomes],
+        config,
+        [LEVELS.level(seed) for seed in seeds],
+        True,
+        policy,
+        profiler,
+        recorder,
+        EVENT_DRIVEN,
+        True,
+        decision_interval=decision_interval
+    )
 
-    def __init__(self, id, x, y):
-        self.id = id
-        self.x = x
-        self.y = y
-        self.width = PLATFORM_SPRITE.get_width()
-        self.height = PLATFORM_SPRITE.get_height()
-        self.x = random.randrange(
-            FIELD_MARGIN,
-            WINDOW_WIDTH - self.width - FIELD_MARGIN
+    stop_fitness = policy.stop_fitness(config)
+
+    if STOP_EVENT is not None and stop_fitness is not None:
+        if aggregate_fitness(fitnesses, aggregate).max() >= stop_fitness:
+            STOP_EVENT.set()
+
+    LEVELS.save()
+
+    # Send the phase stats back along with the fitnesses
+    if profile:
+        profiler.flush()
+    else:
+        profiler = None
+
+    counts["frames"] = frames
+    counts["score"] = int(scores.max())
+    counts["network_hits"] = NETWORKS.hits - hits
+    counts["network_misses"] = NETWORKS.misses - misses
+
+    return fitnesses.tolist(), profiler, counts
+
+# Evaluator
+# Plays every generation on new seeded levels that are shared by all of
+# its genomes, so a generation can be replayed exactly. With more than one
+# level, the fitness of a genome is the aggregate of its fitnesses on them.
+class Evaluator:
+    def __init__(self, headless=False, policy=FULL_EPISODES, seed=0):
+        self.headless = headless
+        self.policy = policy
+        self.seed = seed
+        self.generation = 0
+        self.profiler = None
+        self.record_dir = None
+        self.levels = 1
+        self.aggregate = "mean"
+        self.fixed_levels = False
+        self.spectator = None
+        self.decision_interval = 1
+
+        # Frames simulated in the last generation and the best score
+        self.frames = 0
+        self.score = 0
+
+    # Level seeds of the current generation
+    def level_seeds(self):
+        if self.fixed_levels:
+            return list(range(self.seed, self.seed + self.levels))
+
+        first = self.seed + self.generation * self.levels
+
+        return list(range(first, first + self.levels))
+
+    # Directory the replays of the current generation are written to
+    def replay_dir(self):
+        if not self.record_dir:
+            return None
+
+        return os.path.join(self.record_dir, "generation-{0}".format(self.generation))
+
+    def evaluate(self, genomes, config):
+        replay_dir = self.replay_dir()
+
+        self.frames, fitnesses, scores = simulate_levels(
+            genomes,
+            config,
+            [LEVELS.level(seed) for seed in self.level_seeds()],
+            self.headless,
+            self.policy,
+            self.profiler or NULL_PROFILER,
+            ReplayRecorder(replay_dir) if replay_dir else None,
+            EVENT_DRIVEN,
+            spectator=self.spectator,
+            decision_interval=self.decision_interval
         )
-        self.polygon = False
-
-    # Move down (scroll)
-    def move(self, y):
-        self.y += y
-
-    # Draw Platform
-    def draw(self, win):
-        win.blit(PLATFORM_SPRITE, (self.x, self.y))
-
-        self.polygon = Polygon([
-            (self.x, self.y),
-            (self.x + self.width, self.y),
-            (self.x + self.width, self.y + self.height),
-            (self.x, self.y + self.height)
-        ])
-
-        # In Debug Mode, draw visible collision and coordinates
-        if DEBUG_MODE:
-            # X and Y values
-            win.blit(
-                DEBUG_FONT.render(
-                    "Y: " + str(round(self.y)) + "; X: " + str(round(self.x)),
-                    1,
-                    (0, 0, 0)
-                ),
-                (self.x, self.y)
+        self.score = int(scores.max())
+        assign_fitness(genomes, fitnesses, self.aggregate)
+        LEVELS.save()
+
+        self.generation += 1
+
+    def close(self):
+        pass
+
+# Parallel Evaluator
+# Splits the population over a process pool, each genome plays the levels
+# of the generation on its own. That makes the fitness on a level depend
+# only on the genome, so it is memoized: unchanged genomes that play a
+# level again, like elites with fixed levels, are not simulated again.
+class PoolEvaluator(Evaluator):
+    def __init__(self, workers, chunk_size=None, policy=FULL_EPISODES, seed=0):
+        Evaluator.__init__(self, True, policy, seed)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.memo = FitnessMemo()
+        self.stop_event = multiprocessing.Event()
+        self.pool = multiprocessing.Pool(workers, init_worker, (self.stop_event,))
+
+    def evaluate(self, genomes, config):
+        seeds = self.level_seeds()
+        replay_dir = self.replay_dir()
+        hashes = {}
+        pending = []
+
+        for key, g in genomes:
+            hashes[key] = genome_hash(g)
+
+            # Replays are written while genomes play, so when recording
+            # every genome plays, memoized or not
+            if replay_dir:
+                pending.append((key, g))
+                continue
+
+            fitnesses = [self.memo.get((hashes[key], seed)) for seed in seeds]
+
+            if None in fitnesses:
+                pending.append((key, g))
+            else:
+                g.fitness = float(aggregate_fitness(np.array(fitnesses)[:, None], self.aggregate)[0])
+
+        genomes = pending
+        chunk_size = self.chunk_size
+        self.frames = 0
+        self.score = 0
+
+        # By default give every worker a few chunks to balance the load
+        if not chunk_size:
+            chunk_size = max(1, -(-len(genomes) // (self.workers * 4)))
+
+        chunks = [genomes[i:i + chunk_size] for i in range(0, len(genomes), chunk_size)]
+        jobs = [
+            (
+                [g for _, g in chunk],
+                config,
+                seeds,
+                self.policy,
+                self.profiler is not None,
+                self.aggregate,
+                replay_dir,
+                self.decision_interval
             )
+            for chunk in chunks
+        ]
 
-            # Collision area
-            surface = pygame.Surface((self.width, self.height))
-            surface.set_alpha(128)
-            surface.fill((255, 0, 25))
-            win.blit(surface, (self.x, self.y))
+        for chunk, (fitnesses, profiler, counts) in zip(chunks, self.map(jobs) if jobs else []):
+            NETWORKS.hits += counts["network_hits"]
+            NETWORKS.misses += counts["network_misses"]
+            self.frames += counts["frames"]
+            self.score = max(self.score, counts["score"])
 
-            # Raycast area
-            pygame.draw.polygon(win, (75, 50, 255), self.polygon.exterior.coords, 2)
+            if profiler is not None:
+                self.profiler.merge(profiler)
 
-# Draw objects in window
-def draw_window(win, players, platforms, score):
-    win.blit(BG_SPRITE, (0, 0))
+            # Stopped chunks don't need a fitness, and must not be memoized
+            if fitnesses is None:
+                for _, g in chunk:
+                    g.fitness = 0.0
 
-    for platform in platforms:
-        platform.draw(win)
+                continue
 
-    win.blit(
-        SCORE_FONT.render(str(score), 1, (0, 0, 0)),
-        (10, 10)
-    )
+            fitnesses = np.array(fitnesses)
 
-    for player in players:
-        player.draw(win)
+            for (key, g), level_fitnesses, fitness in zip(
+                chunk,
+                fitnesses.T,
+                aggregate_fitness(fitnesses, self.aggregate)
+            ):
+                g.fitness = float(fitness)
 
-    pygame.display.update()
+                for seed, level_fitness in zip(seeds, level_fitnesses):
+                    self.memo.put((hashes[key], seed), float(level_fitness))
 
-# Generate initial Platforms
-def generateInitialPlatforms():
-    prev_y = FIELD_MARGIN
-    platforms = []
+        self.generation += 1
 
-    # Make sure each platform has enough vertical spacing
-    for i in range(MAX_PLATFORMS):
-        x = random.randrange(
-            FIELD_MARGIN,
-            WINDOW_WIDTH - PLATFORM_SPRITE.get_width() - FIELD_MARGIN
-        )
-        y = prev_y + GAP_SIZE
-        prev_y = y
+    def map(self, jobs):
+        self.stop_event.clear()
 
-        platforms.append(Platform(i, x, y))
+        return self.pool.map(evaluate_genomes, jobs)
 
-    return platforms
+    def close(self):
+        self.pool.close()
+        self.pool.join()
 
-# Main Function
-def main(genomes, config):
-    networks = []
-    ge = []
-    players = []
+# Remote Evaluator
+# Hands chunks of genomes out to workers on other machines that connect to
+# the coordinator over TCP. Jobs of workers that are lost or take longer
+# than job_timeout seconds are given to another worker.
+class RemoteEvaluator(PoolEvaluator):
+    CHUNK_SIZE = 8
 
-    # Set Neural Networks
-    for _, g in genomes:
-        network = neat.nn.FeedForwardNetwork.create(g, config)
-        networks.append(network)
-        players.append(Player(200, 200))
-        g.fitness = 0
-        ge.append(g)
+    def __init__(self, address, authkey, chunk_size=None, policy=FULL_EPISODES, seed=0, job_timeout=120):
+        Evaluator.__init__(self, True, policy, seed)
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        self.memo = FitnessMemo()
+        self.coordinator = Coordinator(address, authkey, job_timeout)
 
-    win = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-    clock = pygame.time.Clock()
-    platforms = generateInitialPlatforms()
-    platform_i = MAX_PLATFORMS
-    current_height = 0
-    run = True
-    score = 0
+    def map(self, jobs):
+        return self.coordinator.map(jobs)
 
-    while run:
-        clock.tick(60)
-
-        # Quit Game
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                run = False
-                pygame.quit()
-                quit()
-
-        # Stop Generation when there are no players left
-        if len(players) <= 0:
-            run = False
-            return
-
-        platform_data = []
-
-        # Refresh Platforms
-        for platform in platforms:
-            if platform.y > WINDOW_HEIGHT:
-                platforms.remove(platform)
-                platforms.append(Platform(
-                    platform_i,
-                    random.randrange(
-                        FIELD_MARGIN,
-                        WINDOW_WIDTH - platform.width - FIELD_MARGIN
-                    ),
-                    -platform.height
-                ))
-                platform_i += 1
-
-        current_height = 0
-
-        for index, player in enumerate(players):
-            player.move()
-
-            # Determine action based on input
-            input_data = player.detect_platform(platforms)
-            input_data.append(1 if player.vy > 0 else 0)
-            input_data.append(1 if player.vy < 0 else 0)
-            input_data.append(1 if player.velocity_x > 0 else 0)
-            input_data.append(1 if player.velocity_x < 0 else 0)
-
-            output = networks[index].activate(input_data)
-            action = output.index(max(output))
-
-            # Move Player based on Neural Network Output
-            if action == 0:
-                player.moveLeft()
-            elif action == 1:
-                player.moveRight()
-
-            # Move Platforms if Player Y is above Jump Threshold
-            prev_height = current_height
-
-            if player.y <= JUMP_THRESHOLD:
-                player.y = JUMP_THRESHOLD
-
-                if -round(player.vy) > prev_height:
-                    current_height = -round(player.vy)
-
-            # Check Player - Platform Collision
-            if player.collide(platforms) and index < len(ge):
-                player.jump()
-
-            # Player Death
-            if player.y >= WINDOW_HEIGHT and index < len(ge):
-                players.pop(index)
-                networks.pop(index)
-                ge.pop(index)
-
-            # Increase fitness if player reaches new height
-            if current_height > 1 and index < len(ge):
-                ge[index].fitness += 0.1
-                player.stagnation_timer = 0
-            else:
-                player.stagnation_timer += 1
+    def close(self):
+        self.coordinator.close()
 
-            # Keep track of stagnation and remove genome when stagnation is too high
-            if player.stagnation_timer > MAX_STAGNATION:
-                player.stagnation_timer = 0
-                players.pop(index)
-                networks.pop(index)
-                ge.pop(index)
+# Evaluate jobs of a coordinator on a number of local processes
+def run_worker(address, authkey, processes=1):
+    workers = [
+        multiprocessing.Process(target=work, args=(address, authkey, evaluate_genomes))
+        for _ in range(max(1, processes))
+    ]
 
-        if current_height > SCROLLING_VELOCITY:
-            current_height = SCROLLING_VELOCITY
+    for worker in workers:
+        worker.start()
 
-        score += current_height
+    for worker in workers:
+        worker.join()
 
-        # Move platforms when Player reaches above Jump Threshold
-        for platform in platforms:
-            platform.move(current_height)
+# Decision interval of a config file's [DoodleJump] section, 1 if it has none
+def read_decision_interval(config_path):
+    parser = configparser.ConfigParser()
+    parser.read(config_path)
+    interval = parser.getint("DoodleJump", "decision_interval", fallback=1)
+
+    if interval < 1:
+        raise ValueError("decision_interval must be at least 1")
 
-        draw_window(win, players, platforms, score)
+    return interval
 
 # Run AI
-def run(config_path):
+def run(config_path, workers=0, chunk_size=None, seed=0, resume=None,
+        checkpoint_every=10, checkpoint_seconds=300, checkpoint_prefix="neat-checkpoint-",
+        profile=False, profile_file=None, record_dir=None, coordinator=None, authkey=None,
+        job_timeout=120, levels=1, aggregate="mean", live=False, fixed_levels=False, telemetry_file=None,
+        generations=None, winner_path="winner", decision_interval=None):
     config = neat.config.Config(
         neat.DefaultGenome,
         neat.DefaultReproduction,
@@ -547,17 +884,85 @@ def run(config_path):
         config_path
     )
 
-    p = neat.Population(config)
+    if coordinator:
+        evaluator = RemoteEvaluator(coordinator, authkey, chunk_size, EPISODES, seed, job_timeout)
+    elif workers > 0:
+        evaluator = PoolEvaluator(workers, chunk_size, EPISODES, seed)
+    else:
+        evaluator = Evaluator(HEADLESS, EPISODES, seed)
+
+    evaluator.record_dir = record_dir
+    evaluator.levels = levels
+    evaluator.aggregate = aggregate
+    evaluator.fixed_levels = fixed_levels
+    evaluator.decision_interval = decision_interval or read_decision_interval(config_path)
+
+    # Watch the in-process simulation from another process
+    if live:
+        evaluator.spectator = LiveSpectator(
+            WINDOW_WIDTH,
+            WINDOW_HEIGHT,
+            RAY_SENSOR,
+            COLLISION_MARGIN,
+            DEBUG_MODE,
+            RENDER_TOP
+        )
+
+    # Continue from a checkpoint, with its config, RNG state and level seeds
+    if resume:
+        p = BackgroundCheckpointer.restore_checkpoint(resume, evaluator)
+    else:
+        p = neat.Population(config)
+
+    checkpointer = BackgroundCheckpointer(
+        evaluator,
+        checkpoint_every,
+        checkpoint_seconds,
+        checkpoint_prefix
+    )
+
     p.add_reporter(neat.StdOutReporter(True))
-    p.add_reporter(neat.StatisticsReporter())
+    p.add_reporter(checkpointer)
+
+    # Per-generation metrics, streamed to a file instead of kept in memory
+    telemetry = None
+
+    if telemetry_file:
+        telemetry = TelemetryReporter(telemetry_file, evaluator)
+        p.add_reporter(telemetry)
+
+    caches = {"Network cache": NETWORKS}
+
+    if isinstance(evaluator, PoolEvaluator):
+        caches["Fitness memo"] = evaluator.memo
+
+    p.add_reporter(CacheReporter(caches))
 
-    winner = p.run(main)
+    # Time the phases of the frame loop
+    if profile or profile_file:
+        evaluator.profiler = FrameProfiler()
+        p.add_reporter(ProfilingReporter(evaluator.profiler, profile_file, profile))
 
-    with open('winner', 'wb') as f:
+    try:
+        winner = p.run(evaluator.evaluate, generations)
+    finally:
+        evaluator.close()
+        checkpointer.close()
+
+        if evaluator.spectator is not None:
+            evaluator.spectator.close()
+
+        if telemetry is not None:
+            telemetry.close()
+
+    with open(winner_path, 'wb') as f:
         pickle.dump(winner, f)
 
-# Run selected genome
-def run_genome(config_path, genome_path = "winner"):
+    return winner
+
+# Run selected genome on seeded levels, optionally recording replays
+def run_genome(config_path, genome_path = "winner", seed=0, record_dir=None, levels=1, aggregate="mean",
+               live=False, decision_interval=None):
     config = neat.config.Config(
         neat.DefaultGenome,
         neat.DefaultReproduction,
@@ -569,12 +974,358 @@ def run_genome(config_path, genome_path = "winner"):
     with open(genome_path, "rb") as f:
         genome = pickle.load(f)
 
-    genomes = [(1, genome)]
-
-    run(genomes, config)
+    genomes = [(genome.key, genome)]
+    spectator = None
+
+    if live:
+        spectator = LiveSpectator(WINDOW_WIDTH, WINDOW_HEIGHT, RAY_SENSOR, COLLISION_MARGIN, DEBUG_MODE, RENDER_TOP)
+
+    try:
+        simulate(
+            genomes,
+            config,
+            [LEVELS.level(level_seed) for level_seed in range(seed, seed + levels)],
+            HEADLESS or live,
+            EPISODES,
+            recorder=ReplayRecorder(record_dir) if record_dir else None,
+            aggregate=aggregate,
+            spectator=spectator,
+            decision_interval=decision_interval or read_decision_interval(config_path)
+        )
+    finally:
+        if spectator is not None:
+            spectator.close()
+
+    print("Fitness: {0:.1f}".format(genome.fitness))
+
+# Play back a recorded episode from its replay file, without NEAT or the
+# network. Space pauses, left and right seek by REPLAY_SEEK frames, up and
+# down double and halve the number of frames played per drawn frame.
+def play_replay(path, start=0, speed=1):
+    import pygame
+    from renderer import Renderer
+
+    header, frames = load_replay(path)
+    level = LEVELS.level(int(header["level_seed"]))
+    scores = np.cumsum(frames["scroll"], dtype=np.int64)
+    renderer = Renderer(WINDOW_WIDTH, WINDOW_HEIGHT, RAY_SENSOR, COLLISION_MARGIN, DEBUG_MODE)
+    state = PopulationState(1, 0, 0)
+
+    platforms = None
+    frame = 0
+    target = start
+    paused = False
+
+    while frame < len(frames):
+        for event in renderer.tick():
+            if event.type != pygame.KEYDOWN:
+                continue
+
+            if event.key == pygame.K_SPACE:
+                paused = not paused
+            elif event.key == pygame.K_RIGHT:
+                target = frame + REPLAY_SEEK
+            elif event.key == pygame.K_LEFT:
+                target = frame - REPLAY_SEEK
+            elif event.key == pygame.K_UP:
+                speed *= 2
+            elif event.key == pygame.K_DOWN:
+                speed = max(1, speed // 2)
+
+        if target < frame or platforms is None:
+            # Seeking back replays the platforms from the start
+            platforms = generateInitialPlatforms(level)
+            platform_i = MAX_PLATFORMS
+            frame = 0
+
+        if not paused and target == frame:
+            target = frame + speed
+
+        # At least one frame is played, so there is one to draw
+        target = min(max(target, 1), len(frames))
+
+        # Platforms only depend on the level and how far it scrolled
+        while frame < target:
+            platform_i = refreshPlatforms(platforms, level, platform_i)
+            platforms.move(int(frames["scroll"][frame]))
+            frame += 1
+
+        record = frames[frame - 1]
+        state.x[0] = record["x"]
+        state.y[0] = record["y"]
+        state.jump_tick[0] = 0 if record["sprite"] & JUMPING else 7
+        state.velocity_x[0] = -1 if record["sprite"] & FACING_LEFT else 1
+
+        renderer.draw(state, platforms, int(scores[frame - 1]))
 
 # Set Config
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NEAT Doodle Jump")
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="simulate without a window or frame cap"
+    )
+    parser.add_argument(
+        "--spectate",
+        action="store_true",
+        help="watch with a cheap renderer that skips frames and draws only the best players"
+    )
+    parser.add_argument(
+        "--render-every",
+        type=int,
+        default=4,
+        help="with --spectate, draw every this many simulation frames"
+    )
+    parser.add_argument(
+        "--render-top",
+        type=int,
+        default=10,
+        help="with --spectate or --live, draw this many living players with the highest fitness (0 for all)"
+    )
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help="simulate at full speed and watch it in a window drawn at 60 FPS by another process"
+    )
+    parser.add_argument(
+        "--event-driven",
+        action="store_true",
+        help="play the frames between network input changes and other events at once when headless. Only "
+             "faster with --decision-interval above 1, at 1 it is slightly slower than the frame loop"
+    )
+    parser.add_argument(
+        "--decision-interval",
+        type=int,
+        default=None,
+        help="activate the networks every this many frames, players keep their last action in between "
+             "(default: decision_interval of the config's [DoodleJump] section, or 1)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="evaluate genomes headless on a pool of this many processes, or with --connect, run this many workers"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="genomes per job sent to a worker"
+    )
+    parser.add_argument(
+        "--max-frames",
+        type=int,
+        default=None,
+        help="stop an episode after this many frames"
+    )
+    parser.add_argument(
+        "--max-idle-jumps",
+        type=int,
+        default=6,
+        help="end an episode when all players landed this many times without climbing higher (0 to never)"
+    )
+    parser.add_argument(
+        "--cull-stuck",
+        action="store_true",
+        help="remove players as soon as they are stuck, instead of when all are"
+    )
+    parser.add_argument(
+        "--full-episodes",
+        action="store_true",
+        help="play episodes out even when all players are stuck or the fitness threshold is reached"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="level seed of the first generation"
+    )
+    parser.add_argument(
+        "--levels",
+        type=int,
+        default=1,
+        help="levels every genome plays each generation, all at once"
+    )
+    parser.add_argument(
+        "--aggregate",
+        default="mean",
+        help="fitness of a genome on several levels: mean, min, or a quantile between 0 and 1"
+    )
+    parser.add_argument(
+        "--fixed-levels",
+        action="store_true",
+        help="play the same levels every generation, so with --workers unchanged genomes keep their fitness"
+    )
+    parser.add_argument(
+        "--generations",
+        type=int,
+        default=None,
+        help="stop training after this many generations, even below the fitness threshold"
+    )
+    parser.add_argument(
+        "--level-cache",
+        default=None,
+        help="directory to cache generated level streams in"
+    )
+    parser.add_argument(
+        "--resume",
+        default=None,
+        help="continue training from this checkpoint file"
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=10,
+        help="save a checkpoint at least every this many generations"
+    )
+    parser.add_argument(
+        "--checkpoint-seconds",
+        type=float,
+        default=300,
+        help="save a checkpoint at least every this many seconds"
+    )
+    parser.add_argument(
+        "--checkpoint-prefix",
+        default="neat-checkpoint-",
+        help="file name prefix of checkpoints"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="report where the frame loop spends its time every generation"
+    )
+    parser.add_argument(
+        "--profile-file",
+        default=None,
+        help="append per-generation frame loop stats to this JSONL file"
+    )
+    parser.add_argument(
+        "--telemetry",
+        default=None,
+        help="append per-generation training metrics to this JSONL file, or CSV if it ends in .csv"
+    )
+    parser.add_argument(
+        "--record",
+        default=None,
+        help="write a replay of every genome to this directory, one subdirectory per generation"
+    )
+    parser.add_argument(
+        "--genome",
+        default=None,
+        help="play this pickled genome on the --seed level instead of training"
+    )
+    parser.add_argument(
+        "--coordinator",
+        default=None,
+        help="serve evaluation jobs to remote workers on this host:port"
+    )
+    parser.add_argument(
+        "--connect",
+        default=None,
+        help="work for the coordinator at this host:port instead of training"
+    )
+    parser.add_argument(
+        "--authkey",
+        default=os.environ.get("DOODLE_JUMP_AUTHKEY"),
+        help="shared secret of the coordinator and its workers, required with --coordinator and --connect "
+             "(default: $DOODLE_JUMP_AUTHKEY)"
+    )
+    parser.add_argument(
+        "--job-timeout",
+        type=float,
+        default=120,
+        help="give a job to another worker when it is not done after this many seconds"
+    )
+    parser.add_argument(
+        "--replay",
+        default=None,
+        help="play back this replay file instead of training"
+    )
+    parser.add_argument(
+        "--replay-start",
+        type=int,
+        default=1,
+        help="frame to start the replay at"
+    )
+    parser.add_argument(
+        "--replay-speed",
+        type=int,
+        default=1,
+        help="frames played per drawn frame"
+    )
+    args = parser.parse_args()
+
+    try:
+        check_aggregate(args.aggregate)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.live and (args.spectate or args.workers or args.coordinator or args.connect or args.replay):
+        parser.error("--live watches the in-process simulation, it can't be combined with --spectate, --workers, "
+                     "--coordinator, --connect or --replay")
+
+    # Jobs and results are pickled, the key is all that keeps others from
+    # running code on the coordinator and its workers
+    if (args.coordinator or args.connect) and not args.authkey:
+        parser.error("--coordinator and --connect need a private --authkey or $DOODLE_JUMP_AUTHKEY")
+
+    if args.levels < 1:
+        parser.error("--levels must be at least 1")
+
+    if args.decision_interval is not None and args.decision_interval < 1:
+        parser.error("--decision-interval must be at least 1")
+
+    if args.levels > 1 and not (args.headless or args.live or args.workers or args.coordinator):
+        parser.error("--levels above 1 needs --headless, --live, --workers or --coordinator")
+
+    HEADLESS = args.headless or args.live
+    SPECTATE = args.spectate
+    RENDER_EVERY = args.render_every
+    RENDER_TOP = args.render_top
+    EVENT_DRIVEN = args.event_driven
+    EPISODES = episode_policy(args.max_frames, args.max_idle_jumps, args.cull_stuck, args.full_episodes)
+    LEVELS.cache_dir = args.level_cache
+
     local_dir = os.path.dirname(__file__)
     config_path = os.path.join(local_dir, "config")
-    run(config_path)
+
+    if args.replay:
+        play_replay(args.replay, args.replay_start, args.replay_speed)
+    elif args.connect:
+        run_worker(parse_address(args.connect), args.authkey.encode(), args.workers)
+    elif args.genome:
+        run_genome(
+            config_path,
+            args.genome,
+            args.seed,
+            args.record,
+            args.levels,
+            args.aggregate,
+            args.live,
+            args.decision_interval
+        )
+    else:
+        run(
+            config_path,
+            args.workers,
+            args.chunk_size,
+            args.seed,
+            args.resume,
+            args.checkpoint_every,
+            args.checkpoint_seconds,
+            args.checkpoint_prefix,
+            args.profile,
+            args.profile_file,
+            args.record,
+            parse_address(args.coordinator) if args.coordinator else None,
+            args.authkey.encode() if args.authkey else None,
+            args.job_timeout,
+            args.levels,
+            args.aggregate,
+            args.live,
+            args.fixed_levels,
+            args.telemetry,
+            args.generations,
+            decision_interval=args.decision_interval
+        )
@@ -0,0 +1,70 @@
+import numpy as np
+
+# Episode Policy
+# Decides when an episode is over. Besides every player being gone, that is
+# when the hard frame budget is spent, when all living players are stuck,
+# or when one of them reached the fitness threshold. Every world of a
+# simulation ends on its own.
+#
+# A player is stuck once it landed max_idle_jumps times without climbing
+# higher than before. Fitness only grows while the level scrolls, and the
+# level only scrolls when a player climbs higher than ever, so stuck players
+# will most likely only wait out MAX_STAGNATION. Ending the episode when all
+# of them are stuck leaves the others alone, culling stuck players one by one
+# ends episodes sooner but also stops the level scrolling for them.
+class EpisodePolicy:
+    def __init__(self, max_frames=None, max_idle_jumps=None, cull_stuck=False, stop_at_threshold=True):
+        self.max_frames = max_frames
+        self.max_idle_jumps = max_idle_jumps
+        self.cull_stuck = cull_stuck
+        self.stop_at_threshold = stop_at_threshold
+
+    # Fitness at which NEAT will stop, if it stops on the best genome
+    def stop_fitness(self, config):
+        if not self.stop_at_threshold or config.fitness_criterion != "max":
+            return None
+
+        if getattr(config, "no_fitness_termination", False):
+            return None
+
+        return config.fitness_threshold
+
+    # Players that stopped making progress
+    def stuck(self, state):
+        return state.idle_jumps >= self.max_idle_jumps
+
+    # Remove stuck players, when culling them one by one
+    def cull(self, state):
+        if self.max_idle_jumps and self.cull_stuck:
+            state.alive &= ~self.stuck(state)
+
+    # Worlds whose episode is over, see PopulationState.world
+    def finished(self, frame, state, stop_fitness=None):
+        if self.max_frames is not None and frame >= self.max_frames:
+            return np.ones(state.worlds, dtype=bool)
+
+        playing = state.alive
+
+        if self.max_idle_jumps:
+            playing = playing & ~self.stuck(state)
+
+        finished = np.bincount(state.world, playing, state.worlds) == 0
+
+        if stop_fitness is not None:
+            best = np.full(state.worlds, -np.inf)
+            np.maximum.at(best, state.world, state.fitness)
+            finished |= best >= stop_fitness
+
+        return finished
+
+# Episode policy of the command line options: play episodes out, or end
+# them once all players landed max_idle_jumps times without climbing (0 to
+# never), culling stuck players one by one if cull_stuck
+def episode_policy(max_frames=None, max_idle_jumps=6, cull_stuck=False, full_episodes=False):
+    if full_episodes:
+        return EpisodePolicy(max_frames, stop_at_threshold=False)
+
+    return EpisodePolicy(max_frames, max_idle_jumps or None, cull_stuck)
+
+# Plays every episode to the end, like the original game
+FULL_EPISODES = EpisodePolicy(stop_at_threshold=False)
@@ -0,0 +1,28 @@
+import numpy as np
+
+# Log-spaced histogram bin edges from 10**low to 10**high, with `per_decade`
+# bins per power of ten. Fixed edges let histograms of different processes
+# be added.
+def log_edges(low, high, per_decade):
+    return np.logspace(low, high, (high - low) * per_decade + 1)
+
+# Empty histogram of the given bin edges, with a bin below the first edge
+# and one above the last
+def empty(edges):
+    return np.zeros(len(edges) + 1, dtype=np.int64)
+
+# Count a value, or an array of values, into a histogram
+def add(histogram, edges, values):
+    np.add.at(histogram, np.searchsorted(edges, values), 1)
+
+# Value below which a fraction q of a histogram's values fall, as the upper
+# edge of the bin it is in
+def percentile(histogram, edges, q):
+    counts = np.cumsum(histogram)
+
+    if counts[-1] == 0:
+        return 0.0
+
+    index = int(np.searchsorted(counts, q * counts[-1]))
+
+    return float(edges[min(index, len(edges) - 1)])
@@ -0,0 +1,101 @@
+import os
+from collections import OrderedDict
+import numpy as np
+
+# Level
+# Deterministic platform stream of one seed. A level is the sequence of
+# platform x positions by platform id, generated lazily in fixed-size
+# chunks that each have their own seed, so any prefix can be cached and
+# extended later without replaying the generator.
+class Level:
+    CHUNK_SIZE = 256
+
+    def __init__(self, seed, low, high, xs=None):
+        self.seed = seed
+        self.low = low
+        self.high = high
+        self.xs = np.zeros(0, dtype=np.int32) if xs is None else np.asarray(xs, dtype=np.int32)
+        self.saved = len(self.xs)
+
+    # X position of platform i
+    def x(self, i):
+        while i >= len(self.xs):
+            self.extend()
+
+        return int(self.xs[i])
+
+    # Generate the next chunk of platforms
+    def extend(self):
+        chunk = len(self.xs) // self.CHUNK_SIZE
+        rng = np.random.default_rng([self.seed, chunk])
+        xs = rng.integers(self.low, self.high, self.CHUNK_SIZE, dtype=np.int32)
+        self.xs = np.concatenate((self.xs, xs))
+
+# Level Generator
+# Memoizes levels by seed so every genome and re-evaluation in a process
+# replays the same stream, optionally backed by an on-disk cache shared
+# between processes and runs
+class LevelGenerator:
+    MAX_LEVELS = 64
+
+    def __init__(self, low, high, cache_dir=None):
+        self.low = low
+        self.high = high
+        self.cache_dir = cache_dir
+        self.levels = OrderedDict()
+
+    def level(self, seed):
+        if seed in self.levels:
+            self.levels.move_to_end(seed)
+            return self.levels[seed]
+
+        level = self.load(seed)
+
+        if level is None:
+            level = Level(seed, self.low, self.high)
+
+        self.levels[seed] = level
+
+        while len(self.levels) > self.MAX_LEVELS:
+            self.levels.popitem(last=False)
+
+        return level
+
+    def path(self, seed):
+        return os.path.join(self.cache_dir, "level-{0}-{1}-{2}.npy".format(seed, self.low, self.high))
+
+    # Read a cached level stream, if there is one
+    def load(self, seed):
+        if not self.cache_dir:
+            return None
+
+        try:
+            xs = np.load(self.path(seed))
+        except (OSError, ValueError):
+            return None
+
+        # Only whole chunks are valid, a partial one would change the stream
+        xs = xs[:len(xs) - len(xs) % Level.CHUNK_SIZE]
+
+        return Level(seed, self.low, self.high, xs)
+
+    # Write levels that grew since they were loaded or last saved
+    def save(self):
+        if not self.cache_dir:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        for seed, level in self.levels.items():
+            if len(level.xs) <= level.saved:
+                continue
+
+            # Write atomically, other processes may be reading the same level
+            path = self.path(seed)
+            temp_path = "{0}.{1}.tmp".format(path, os.getpid())
+
+            with open(temp_path, "wb") as f:
+                np.save(f, level.xs)
+
+            os.replace(temp_path, path)
+            level.saved = len(level.xs)
@@ -0,0 +1,140 @@
+import time
+import queue
+import multiprocessing
+import numpy as np
+from assets import PLAYER_WIDTH, PLAYER_HEIGHT, PLATFORM_WIDTH, PLATFORM_HEIGHT
+
+# Living players of a world with the highest fitness, at most top_n of them
+# (all of them when top_n is 0)
+def top_players(state, top_n, world=None):
+    index = state.living()
+
+    if world is not None and state.worlds > 1:
+        index = index[state.world[index] == world]
+
+    if top_n and len(index) > top_n:
+        best = np.argpartition(-state.fitness[index], top_n - 1)[:top_n]
+        index = np.sort(index[best])
+
+    return index
+
+# Snapshot State
+# Copy of the players of a frame with the attributes the renderer reads
+class SnapshotState:
+    def __init__(self, x, y, jump_tick, velocity_x, rays_collided, fitness):
+        self.width = PLAYER_WIDTH
+        self.height = PLAYER_HEIGHT
+        self.x = x
+        self.y = y
+        self.jump_tick = jump_tick
+        self.velocity_x = velocity_x
+        self.rays_collided = rays_collided
+        self.fitness = fitness
+
+    def living(self):
+        return np.arange(len(self.x))
+
+# Snapshot Platforms
+# Copy of the platform boxes of a frame
+class SnapshotPlatforms:
+    def __init__(self, boxes):
+        self.width = PLATFORM_WIDTH
+        self.height = PLATFORM_HEIGHT
+        self.platform_boxes = boxes
+
+    def boxes(self):
+        return self.platform_boxes
+
+# Draw the newest snapshot of the queue at the renderer's frame rate until
+# the None sentinel arrives or the window is closed. Snapshots that came in
+# since the last drawn frame are dropped.
+def render_snapshots(snapshots, width, height, sensor, collision_margin, debug):
+    from renderer import LiveRenderer
+
+    renderer = LiveRenderer(width, height, sensor, collision_margin, debug)
+
+    while True:
+        renderer.tick()
+        snapshot = None
+
+        try:
+            while True:
+                snapshot = snapshots.get_nowait()
+
+                if snapshot is None:
+                    return
+        except queue.Empty:
+            pass
+
+        if snapshot is not None:
+            score, boxes, players = snapshot
+            renderer.draw(SnapshotState(*players), SnapshotPlatforms(boxes), score)
+
+# Live Spectator
+# Shows a simulation that runs at full speed in a window drawn by another
+# process. The simulation publishes a snapshot of the top_n players, the
+# platforms and the score at most FPS times a second, into a short queue.
+# When the window falls behind, new snapshots are dropped instead of
+# waiting for it, and it draws only the newest of those that arrived, so
+# the simulation never waits for drawing.
+class LiveSpectator:
+    FPS = 60
+    QUEUE_SIZE = 2
+
+    def __init__(self, width, height, sensor, collision_margin, debug=False, top_n=10):
+        self.top_n = top_n
+        self.interval = 1.0 / self.FPS
+        self.next_publish = 0.0
+        self.published = 0
+        self.dropped = 0
+        self.snapshots = multiprocessing.Queue(self.QUEUE_SIZE)
+        self.process = multiprocessing.Process(
+            target=render_snapshots,
+            args=(self.snapshots, width, height, sensor, collision_margin, debug),
+            daemon=True
+        )
+        self.process.start()
+
+    # Called every simulated frame, takes a snapshot of one world when the
+    # window is due for the next one
+    def publish(self, state, platforms, score, world=0):
+        now = time.perf_counter()
+
+        if now < self.next_publish:
+            return
+
+        self.next_publish = now + self.interval
+
+        # The window was closed, keep simulating without it
+        if not self.process.is_alive():
+            self.next_publish = float("inf")
+            return
+
+        # Fancy indexing copies, the queue pickles the snapshot later
+        index = top_players(state, self.top_n, world)
+        players = (
+            state.x[index],
+            state.y[index],
+            state.jump_tick[index],
+            state.velocity_x[index],
+            state.rays_collided[index],
+            state.fitness[index]
+        )
+
+        try:
+            self.snapshots.put_nowait((int(score[world]), platforms.boxes(world), players))
+            self.published += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self.process.is_alive():
+            try:
+                self.snapshots.put(None, timeout=1)
+            except queue.Full:
+                pass
+
+            self.process.join(1)
+
+        if self.process.is_alive():
+            self.process.terminate()
@@ -0,0 +1,294 @@
+import numpy as np
+
+# NumPy versions of the neat-python activation functions
+ACTIVATIONS = {
+    "sigmoid": lambda z: 1.0 / (1.0 + np.exp(-np.clip(5.0 * z, -60.0, 60.0))),
+    "tanh": lambda z: np.tanh(np.clip(2.5 * z, -60.0, 60.0)),
+    "sin": lambda z: np.sin(np.clip(5.0 * z, -60.0, 60.0)),
+    "gauss": lambda z: np.exp(-5.0 * np.clip(z, -3.4, 3.4) ** 2),
+    "relu": lambda z: np.maximum(z, 0.0),
+    "identity": lambda z: z,
+    "clamped": lambda z: np.clip(z, -1.0, 1.0),
+    "abs": np.abs,
+    "hat": lambda z: np.maximum(0.0, 1 - np.abs(z)),
+    "square": lambda z: z ** 2,
+    "cube": lambda z: z ** 3
+}
+
+# Network Layer
+# All nodes of the population that are evaluated at the same depth, with
+# the connections feeding them
+class NetworkLayer:
+    def __init__(self):
+        self.nodes = []
+        self.biases = []
+        self.responses = []
+        self.activations = []
+        self.sources = []
+        self.targets = []
+        self.weights = []
+        self.rows = []
+        self.connection_rows = []
+        self.size = 0
+
+    # Add the nodes of a genome's program layer, whose node values are in
+    # the given row of `width` values
+    def add(self, program_layer, row, width):
+        nodes, biases, responses, activations, sources, targets, weights = program_layer
+        offset = row * width
+
+        self.nodes.append(nodes + offset)
+        self.rows.append(np.full(len(nodes), row, dtype=np.intp))
+        self.connection_rows.append(np.full(len(sources), row, dtype=np.intp))
+        self.biases.append(biases)
+        self.responses.append(responses)
+        self.activations += activations
+        self.sources.append(sources + offset)
+        self.targets.append(targets + self.size)
+        self.weights.append(weights)
+        self.size += len(nodes)
+
+    # Turn the collected arrays into single ones, grouping nodes by activation
+    def compile(self):
+        self.nodes = np.concatenate(self.nodes)
+        self.biases = np.concatenate(self.biases)
+        self.responses = np.concatenate(self.responses)
+        self.sources = np.concatenate(self.sources)
+        self.targets = np.concatenate(self.targets)
+        self.weights = np.concatenate(self.weights)
+        self.rows = np.concatenate(self.rows)
+        self.connection_rows = np.concatenate(self.connection_rows)
+
+        names = self.activations
+        self.activations = [
+            (ACTIVATIONS[name], np.array([i for i, n in enumerate(names) if n == name], dtype=np.intp))
+            for name in sorted(set(names))
+        ]
+
+    # Copy of the layer with only the nodes and connections of the rows
+    # whose position isn't -1, their values moved to those positions.
+    # Connections keep their order, so the sums don't change.
+    def select(self, position, width):
+        keep = position[self.rows] >= 0
+        kept = position[self.connection_rows] >= 0
+        renumber = np.cumsum(keep) - 1
+        rows = self.rows[keep]
+        connection_rows = self.connection_rows[kept]
+
+        layer = NetworkLayer()
+        layer.nodes = self.nodes[keep] + (position[rows] - rows) * width
+        layer.biases = self.biases[keep]
+        layer.responses = self.responses[keep]
+        layer.sources = self.sources[kept] + (position[connection_rows] - connection_rows) * width
+        layer.targets = renumber[self.targets[kept]]
+        layer.weights = self.weights[kept]
+        layer.rows = position[rows]
+        layer.connection_rows = position[connection_rows]
+        layer.activations = [(activation, renumber[nodes[keep[nodes]]]) for activation, nodes in self.activations]
+        layer.size = len(layer.nodes)
+
+        return layer
+
+# Compile a feed-forward genome into its program: for every depth, the
+# nodes evaluated there and the connections feeding them, as arrays of node
+# slots in the genome's own row of inputs, outputs, then hidden nodes
+def compile_genome(genome, input_keys, output_keys):
+    # Imported here so exported policies can use the activations without neat
+    from neat.graphs import feed_forward_layers
+
+    slots = {}
+
+    for key in input_keys + output_keys:
+        slots[key] = len(slots)
+
+    for key in genome.nodes:
+        if key not in slots:
+            slots[key] = len(slots)
+
+    # Same evaluation order and inputs as neat.nn.FeedForwardNetwork
+    connections = [cg.key for cg in genome.connections.values() if cg.enabled]
+    program = []
+
+    for nodes in feed_forward_layers(input_keys, output_keys, connections):
+        layer = ([], [], [], [], [], [], [])
+        layer_nodes, biases, responses, activations, sources, targets, weights = layer
+
+        for node in nodes:
+            ng = genome.nodes[node]
+
+            if ng.aggregation != "sum":
+                raise ValueError("Unsupported aggregation: " + str(ng.aggregation))
+
+            if ng.activation not in ACTIVATIONS:
+                raise ValueError("Unsupported activation: " + str(ng.activation))
+
+            for conn_key in connections:
+                inode, onode = conn_key
+
+                if onode == node:
+                    sources.append(slots[inode])
+                    targets.append(len(layer_nodes))
+                    weights.append(genome.connections[conn_key].weight)
+
+            layer_nodes.append(slots[node])
+            biases.append(ng.bias)
+            responses.append(ng.response)
+            activations.append(ng.activation)
+
+        program.append((
+            np.array(layer_nodes, dtype=np.intp),
+            np.array(biases, dtype=float),
+            np.array(responses, dtype=float),
+            activations,
+            np.array(sources, dtype=np.intp),
+            np.array(targets, dtype=np.intp),
+            np.array(weights, dtype=float)
+        ))
+
+    return program
+
+# Population Network
+# Compiles the feed-forward genomes of a generation into layered, sparse
+# weight arrays so all of them are activated in one batched forward pass.
+# Every genome gets a row of `width` node values: inputs, outputs, then
+# hidden nodes. Genome programs come from the cache when one is given, and
+# a genome that is in the list more than once is compiled once.
+#
+# Once fewer than half the rows are activated, only the layers of a subset
+# of rows holding them are evaluated, so the cost follows the living
+# players. The subset is kept until half of its rows are no longer
+# activated, so it is rebuilt a few times per episode, not every frame.
+class PopulationNetwork:
+    def __init__(self, genomes, config, cache=None):
+        genome_config = config.genome_config
+        input_keys = genome_config.input_keys
+        output_keys = genome_config.output_keys
+
+        self.size = len(genomes)
+        self.num_inputs = len(input_keys)
+        self.num_outputs = len(output_keys)
+        self.width = self.num_inputs + self.num_outputs + max(
+            [len(genome.nodes) for genome in genomes] + [0]
+        )
+        self.layers = []
+        programs = {}
+
+        for g, genome in enumerate(genomes):
+            program = programs.get(id(genome))
+
+            if program is None:
+                if cache is not None:
+                    program = cache.program(genome, input_keys, output_keys)
+                else:
+                    program = compile_genome(genome, input_keys, output_keys)
+
+                programs[id(genome)] = program
+
+            for depth, program_layer in enumerate(program):
+                if depth == len(self.layers):
+                    self.layers.append(NetworkLayer())
+
+                self.layers[depth].add(program_layer, g, self.width)
+
+        for layer in self.layers:
+            layer.compile()
+
+        self.all_rows = (np.arange(self.size), self.size, self.layers)
+        self.selected = None
+
+    # Positions of the rows in the evaluated subset, -1 for rows left out,
+    # its number of rows and its layers, for activating the given rows
+    def selection(self, index):
+        if 2 * len(index) > self.size:
+            return self.all_rows
+
+        if self.selected is not None:
+            position, count, layers = self.selected
+
+            if 2 * len(index) >= count and (position[index] >= 0).all():
+                return self.selected
+
+        selected = np.zeros(self.size, dtype=bool)
+        selected[index] = True
+        position = np.where(selected, np.cumsum(selected) - 1, -1)
+        layers = [layer.select(position, self.width) for layer in self.layers]
+        self.selected = (position, len(index), layers)
+
+        return self.selected
+
+    # Activate the networks of the given genomes, returns their outputs
+    def activate(self, index, inputs):
+        index = np.asarray(index, dtype=np.intp)
+        position, count, layers = self.selection(index)
+        rows = position[index]
+        values = np.zeros(count * self.width)
+        values.reshape(count, self.width)[rows, :self.num_inputs] = inputs
+
+        for layer in layers:
+            # Sum weighted inputs per node, in connection order
+            sums = np.bincount(
+                layer.targets,
+                weights=values[layer.sources] * layer.weights,
+                minlength=len(layer.nodes)
+            )
+            z = layer.biases + layer.responses * sums
+
+            for activation, nodes in layer.activations:
+                values[layer.nodes[nodes]] = activation(z[nodes])
+
+        return values.reshape(count, self.width)[
+            rows,
+            self.num_inputs:self.num_inputs + self.num_outputs
+        ]
+
+    # Index of the strongest output for the given genomes
+    def actions(self, index, inputs):
+        return np.argmax(self.activate(index, inputs), axis=1)
+
+# Count genomes whose action differs from neat.nn.FeedForwardNetwork
+def check_equivalence(genomes, config, inputs):
+    import neat
+
+    network = PopulationNetwork(genomes, config)
+    index = np.arange(len(genomes))
+    mismatches = 0
+
+    for row in inputs:
+        batch = np.tile(row, (len(genomes), 1))
+        actions = network.actions(index, batch)
+
+        for genome, action in zip(genomes, actions):
+            output = neat.nn.FeedForwardNetwork.create(genome, config).activate(list(row))
+
+            if output.index(max(output)) != action:
+                mismatches += 1
+
+    return mismatches
+
+# Check against neat-python on mutated genomes of the project config
+if __name__ == "__main__":
+    import os
+    import random
+    import neat
+
+    config = neat.config.Config(
+        neat.DefaultGenome,
+        neat.DefaultReproduction,
+        neat.DefaultSpeciesSet,
+        neat.DefaultStagnation,
+        os.path.join(os.path.dirname(__file__), "config")
+    )
+
+    random.seed(0)
+    population = neat.Population(config)
+    genomes = list(population.population.values())
+
+    # Grow some structure so hidden layers are exercised
+    for _ in range(20):
+        for genome in genomes:
+            genome.mutate(config.genome_config)
+
+    inputs = np.array([[random.randint(0, 1) for _ in range(config.genome_config.num_inputs)] for _ in range(50)])
+    mismatches = check_equivalence(genomes, config, inputs)
+
+    print(str(mismatches) + " mismatches in " + str(len(genomes) * len(inputs)) + " activations")
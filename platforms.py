@@ -0,0 +1,182 @@
+import numpy as np
+
+# Platform Buffer
+# Fixed-capacity ring of platform records kept in NumPy arrays. Platforms
+# spawn above all others and scroll together, so oldest to newest is always
+# bottom to top: removing the oldest and reusing its slot keeps the ring
+# ordered by y without sorting or allocating.
+class PlatformBuffer:
+    def __init__(self, capacity, width, height):
+        self.capacity = capacity
+        self.width = width
+        self.height = height
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    # Add a platform above all others
+    def push(self, id, x, y):
+        if self.count == self.capacity:
+            raise IndexError("Platform buffer is full")
+
+        slot = (self.head + self.count) % self.capacity
+        self.ids[slot] = id
+        self.x[slot] = x
+        self.y[slot] = y
+        self.count += 1
+
+    # Remove the lowest platform
+    def pop(self):
+        if self.count == 0:
+            raise IndexError("Platform buffer is empty")
+
+        self.head = (self.head + 1) % self.capacity
+        self.count -= 1
+
+    # Y of the lowest platform
+    def bottom(self):
+        return self.y[self.head]
+
+    # Move down (scroll)
+    def move(self, y):
+        self.y += y
+
+    # Slots ordered from top to bottom
+    def order(self):
+        return (self.head + self.count - 1 - np.arange(self.count)) % self.capacity
+
+    # All platforms as (x, y, width, height) boxes, top to bottom
+    def boxes(self):
+        order = self.order()
+
+        return np.column_stack((
+            self.x[order],
+            self.y[order],
+            np.full(self.count, self.width, dtype=float),
+            np.full(self.count, self.height, dtype=float)
+        ))
+
+# Platform Batch
+# The platform rings of several independent worlds, one row of
+# (worlds, capacity) arrays each, so worlds that scroll by different amounts
+# are refreshed, moved and queried together. Every row works like a
+# PlatformBuffer.
+class PlatformBatch:
+    def __init__(self, buffers):
+        first = buffers[0]
+        self.worlds = len(buffers)
+        self.capacity = first.capacity
+        self.width = first.width
+        self.height = first.height
+        self.ids = np.array([buffer.ids for buffer in buffers])
+        self.x = np.array([buffer.x for buffer in buffers])
+        self.y = np.array([buffer.y for buffer in buffers])
+        self.head = np.array([buffer.head for buffer in buffers], dtype=np.intp)
+        self.count = np.array([len(buffer) for buffer in buffers], dtype=np.intp)
+        self.rows = np.arange(self.worlds)
+        self.index = None
+
+    # Y of the lowest platform of every world, -inf for empty worlds
+    def bottom(self):
+        return np.where(self.count > 0, self.y[self.rows, self.head], -np.inf)
+
+    # Replace the lowest platform of the given worlds with one above all others
+    def replace(self, worlds, ids, xs, y):
+        head = (self.head[worlds] + 1) % self.capacity
+        slots = (head + self.count[worlds] - 1) % self.capacity
+        self.head[worlds] = head
+        self.ids[worlds, slots] = ids
+        self.x[worlds, slots] = xs
+        self.y[worlds, slots] = y
+        self.index = None
+
+    # Move every world down by its own scroll
+    def move(self, y):
+        self.y += np.asarray(y)[:, None]
+        self.index = None
+
+    # Slots of every world ordered from top to bottom, (worlds, capacity)
+    # with the slots past a world's count at the end
+    def order(self):
+        return (self.head[:, None] + self.count[:, None] - 1 - np.arange(self.capacity)) % self.capacity
+
+    # Platforms of one world as (x, y, width, height) boxes, top to bottom
+    def boxes(self, world=0):
+        order = self.order()[world, :self.count[world]]
+
+        return np.column_stack((
+            self.x[world, order],
+            self.y[world, order],
+            np.full(len(order), self.width, dtype=float),
+            np.full(len(order), self.height, dtype=float)
+        ))
+
+    # Platforms of world worlds[i] overlapping the vertical band
+    # [tops[i], bottoms[i]], found by binary search. Returns padded
+    # (bands, k, 4) boxes and a (bands, k) mask of which of them are real.
+    def query(self, worlds, tops, bottoms):
+        tops = np.asarray(tops, dtype=float)
+        bottoms = np.asarray(bottoms, dtype=float)
+        order = self.search_index()[0]
+
+        low = self.search(worlds, tops - self.height, "left")
+        high = self.search(worlds, bottoms, "right")
+        k = int((high - low).max()) if len(tops) else 0
+
+        index = low[:, None] + np.arange(k)
+        valid = index < high[:, None]
+        slots = order[worlds[:, None], np.minimum(index, self.capacity - 1)]
+
+        boxes = np.empty(index.shape + (4,))
+        boxes[..., 0] = self.x[worlds[:, None], slots]
+        boxes[..., 1] = self.y[worlds[:, None], slots]
+        boxes[..., 2] = self.width
+        boxes[..., 3] = self.height
+
+        return boxes, valid
+
+    # Slots of every world top to bottom, their y's as one flat array with
+    # inf past a world's count, and those y's as one sorted array of keys:
+    # each world is shifted into a range of its own, `span` apart, with its
+    # empty slots above all platforms. Kept until platforms change, so the
+    # queries of a frame share it.
+    def search_index(self):
+        if self.index is None:
+            order = self.order()
+            ys = self.y[self.rows[:, None], order]
+            ys[np.arange(self.capacity) >= self.count[:, None]] = np.inf
+
+            # Unused slots keep old y's, which only widen the range
+            low_y = self.y.min() - 1
+            high_y = self.y.max() + 1
+            span = high_y - low_y + 2
+            keys = np.minimum(ys, high_y + 1) - low_y + span * self.rows[:, None]
+
+            self.index = (order, ys.ravel(), keys.ravel(), low_y, high_y, span)
+
+        return self.index
+
+    # Number of platforms of world worlds[i] above values[i], or with side
+    # "right" at or above it. Values are clipped into the platforms' range,
+    # which keeps the counts, and shifted into the range of their world.
+    # Shifting can round a value onto a platform next to it, so the counts
+    # are settled with exact comparisons.
+    def search(self, worlds, values, side):
+        _, ys, keys, low_y, high_y, span = self.search_index()
+        start = worlds * self.capacity
+        counts = np.searchsorted(keys, np.clip(values, low_y, high_y) - low_y + span * worlds, side) - start
+        inside = np.less if side == "left" else np.less_equal
+
+        while True:
+            below = (counts > 0) & ~inside(ys[start + np.maximum(counts - 1, 0)], values)
+            above = (counts < self.capacity) & inside(ys[start + np.minimum(counts, self.capacity - 1)], values)
+
+            if not (below.any() or above.any()):
+                return counts
+
+            counts = counts - below + above
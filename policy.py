@@ -0,0 +1,383 @@
+import os
+import stat
+import time
+import socket
+import struct
+import argparse
+import threading
+import socketserver
+import numpy as np
+import histograms
+from networks import ACTIVATIONS
+from distributed import parse_address
+
+# Version of the policy file format
+VERSION = 1
+
+# Request header: rows and features of the batch of float64 feature
+# vectors that follows. The reply is one action byte per row.
+HEADER = struct.Struct("<II")
+
+# Per-batch latency histogram bins, log-spaced from 100 nanoseconds to 10
+# seconds
+BIN_EDGES = histograms.log_edges(-7, 1, 20)
+
+# Export a feed-forward genome as a self-contained policy file: per depth,
+# the nodes evaluated there with their biases and activations, and a dense
+# matrix of weights from every node slot to them, scaled by the responses
+# of the nodes they feed. Loading and running it only needs NumPy.
+def export_policy(genome, config, path):
+    from networks import compile_genome
+
+    input_keys = config.genome_config.input_keys
+    output_keys = config.genome_config.output_keys
+    program = compile_genome(genome, input_keys, output_keys)
+
+    # Slots of inputs, then outputs and hidden nodes, as in compile_genome
+    width = len(input_keys) + len(genome.nodes)
+    arrays = {
+        "version": VERSION,
+        "inputs": len(input_keys),
+        "outputs": len(output_keys),
+        "width": width,
+        "depth": len(program),
+        "key": genome.key,
+        "fitness": genome.fitness if genome.fitness is not None else np.nan
+    }
+
+    for depth, (nodes, biases, responses, activations, sources, targets, weights) in enumerate(program):
+        dense = np.zeros((width, len(nodes)))
+        np.add.at(dense, (sources, targets), weights)
+        dense *= responses
+
+        arrays["layer{0}_nodes".format(depth)] = nodes
+        arrays["layer{0}_biases".format(depth)] = biases
+        arrays["layer{0}_activations".format(depth)] = np.array(activations, dtype=str)
+        arrays["layer{0}_weights".format(depth)] = dense
+
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+
+# Policy
+# Exported champion network, evaluated for a batch of feature vectors with
+# one matrix product per depth
+class Policy:
+    def __init__(self, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != VERSION:
+                raise ValueError("Unsupported policy file version: " + str(data["version"]))
+
+            self.num_inputs = int(data["inputs"])
+            self.num_outputs = int(data["outputs"])
+            self.width = int(data["width"])
+            self.key = int(data["key"])
+            self.fitness = float(data["fitness"])
+            self.layers = []
+
+            for depth in range(int(data["depth"])):
+                nodes = data["layer{0}_nodes".format(depth)]
+                names = data["layer{0}_activations".format(depth)].tolist()
+                activations = []
+
+                for name in sorted(set(names)):
+                    index = np.array([i for i, n in enumerate(names) if n == name], dtype=np.intp)
+
+                    # Whole layers with one activation skip fancy indexing
+                    if len(index) == len(names):
+                        index = slice(None)
+
+                    activations.append((ACTIVATIONS[name], index, nodes[index]))
+
+                self.layers.append((
+                    data["layer{0}_biases".format(depth)],
+                    data["layer{0}_weights".format(depth)],
+                    activations
+                ))
+
+    # Output values for a feature vector or a (rows, features) batch of them
+    def activate(self, features):
+        features = np.asarray(features, dtype=float)
+        single = features.ndim == 1
+        features = features.reshape(-1, features.shape[-1])
+
+        if features.shape[1] != self.num_inputs:
+            raise ValueError("Expected {0} features, got {1}".format(self.num_inputs, features.shape[1]))
+
+        values = np.zeros((len(features), self.width))
+        values[:, :self.num_inputs] = features
+
+        for biases, weights, activations in self.layers:
+            z = values @ weights + biases
+
+            for activation, index, nodes in activations:
+                values[:, nodes] = activation(z[:, index])
+
+        outputs = values[:, self.num_inputs:self.num_inputs + self.num_outputs]
+
+        return outputs[0] if single else outputs
+
+    # Action of the strongest output, 0 moves left and 1 right
+    def actions(self, features):
+        return np.argmax(self.activate(features), axis=-1)
+
+# Latency Stats
+# Histogram of per-batch latencies, thread-safe and of fixed size however
+# many batches are added
+class LatencyStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histogram = histograms.empty(BIN_EDGES)
+        self.batches = 0
+        self.rows = 0
+
+    def add(self, seconds, rows):
+        with self.lock:
+            histograms.add(self.histogram, BIN_EDGES, seconds)
+            self.batches += 1
+            self.rows += rows
+
+    # Latency below which a fraction q of the batches fall, as the upper
+    # edge of the histogram bin it is in
+    def percentile(self, q):
+        return histograms.percentile(self.histogram, BIN_EDGES, q)
+
+    def summary(self):
+        return "{0} batches, {1} rows  p50 {2:.1f} us  p90 {3:.1f} us  p99 {4:.1f} us  p99.9 {5:.1f} us".format(
+            self.batches,
+            self.rows,
+            1e6 * self.percentile(0.5),
+            1e6 * self.percentile(0.9),
+            1e6 * self.percentile(0.99),
+            1e6 * self.percentile(0.999)
+        )
+
+# Unix socket path, or (host, port) of a host:port address
+def policy_address(address):
+    if "/" in address or ":" not in address:
+        return address
+
+    return parse_address(address)
+
+# Read exactly size bytes from a socket, or None when it closes first
+def receive(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+
+    while received < size:
+        count = sock.recv_into(view[received:])
+
+        if count == 0:
+            return None
+
+        received += count
+
+    return buffer
+
+# Policy Handler
+# Answers the batches of one connection until it closes. Only evaluating
+# the policy is timed, so the latencies don't depend on the client.
+class PolicyHandler(socketserver.BaseRequestHandler):
+    def setup(self):
+        if self.request.family != socket.AF_UNIX:
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        policy = self.server.policy
+
+        while True:
+            header = receive(self.request, HEADER.size)
+
+            if header is None:
+                return
+
+            rows, features = HEADER.unpack(header)
+
+            # A client that doesn't speak the protocol is disconnected
+            if features != policy.num_inputs or rows > self.server.MAX_ROWS:
+                return
+
+            payload = receive(self.request, rows * features * 8)
+
+            if payload is None:
+                return
+
+            start = time.perf_counter()
+            actions = policy.actions(np.frombuffer(payload, dtype="<f8").reshape(rows, features))
+            self.server.latency.add(time.perf_counter() - start, rows)
+
+            self.request.sendall(actions.astype(np.uint8).tobytes())
+
+# Policy Server Mixin
+# Serves a policy to any number of connections, reporting its latencies
+# every report_seconds
+class PolicyServerMixin:
+    MAX_ROWS = 1 << 20
+    daemon_threads = True
+
+    def setup_policy(self, policy, report_seconds):
+        self.policy = policy
+        self.latency = LatencyStats()
+        self.report_seconds = report_seconds
+        self.next_report = time.monotonic() + report_seconds
+        self.reported_batches = 0
+
+    # Called between requests by serve_forever, reports only when batches
+    # arrived since the last report
+    def service_actions(self):
+        if self.report_seconds and time.monotonic() >= self.next_report:
+            self.next_report = time.monotonic() + self.report_seconds
+
+            if self.latency.batches != self.reported_batches:
+                self.reported_batches = self.latency.batches
+                print(self.latency.summary(), flush=True)
+
+class TCPPolicyServer(PolicyServerMixin, socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+
+class UnixPolicyServer(PolicyServerMixin, socketserver.ThreadingUnixStreamServer):
+    pass
+
+# Serve a policy file on a Unix socket path or host:port
+def serve(path, address, report_seconds=10):
+    policy = Policy(path)
+    address = policy_address(address)
+
+    if isinstance(address, str):
+        # Replace the socket of a server that didn't shut down cleanly
+        if os.path.exists(address) and stat.S_ISSOCK(os.stat(address).st_mode):
+            os.remove(address)
+
+        server = UnixPolicyServer(address, PolicyHandler)
+    else:
+        server = TCPPolicyServer(address, PolicyHandler)
+
+    server.setup_policy(policy, report_seconds)
+    print("Serving genome {0} (fitness {1:.1f}) on {2}".format(policy.key, policy.fitness, address), flush=True)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(server.latency.summary())
+
+        if isinstance(address, str):
+            os.remove(address)
+
+# Policy Client
+# Sends batches of feature vectors to a policy server and returns its actions
+class PolicyClient:
+    def __init__(self, address):
+        address = policy_address(address)
+
+        if isinstance(address, str):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        self.sock.connect(address)
+
+    def actions(self, features):
+        features = np.ascontiguousarray(features, dtype="<f8")
+        rows, columns = features.shape
+        self.sock.sendall(HEADER.pack(rows, columns) + features.tobytes())
+        reply = receive(self.sock, rows)
+
+        if reply is None:
+            raise ConnectionError("Policy server closed the connection")
+
+        return np.frombuffer(reply, dtype=np.uint8)
+
+    def close(self):
+        self.sock.close()
+
+# Latencies of a policy, in process or through a server, for batches of
+# random binary feature vectors like the game's
+def bench(act, num_inputs, batch_sizes, requests, seed=0):
+    rng = np.random.default_rng(seed)
+
+    for rows in batch_sizes:
+        latency = LatencyStats()
+        features = rng.integers(0, 2, (requests, rows, num_inputs)).astype(float)
+
+        for batch in features:
+            start = time.perf_counter()
+            act(batch)
+            latency.add(time.perf_counter() - start, rows)
+
+        print("batch {0: >5}: {1}".format(rows, latency.summary()))
+
+# Count inputs where the exported policy picks another action than
+# neat.nn.FeedForwardNetwork
+def check_policy(policy, genome, config, samples=1000, seed=0):
+    import neat
+
+    network = neat.nn.FeedForwardNetwork.create(genome, config)
+    features = np.random.default_rng(seed).integers(0, 2, (samples, policy.num_inputs)).astype(float)
+    actions = policy.actions(features)
+    mismatches = 0
+
+    for row, action in zip(features, actions):
+        output = network.activate(list(row))
+
+        if output.index(max(output)) != action:
+            mismatches += 1
+
+    return mismatches
+
+# Export, serve or benchmark champion policies
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NEAT Doodle Jump champion policies")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="export a pickled genome as a NumPy policy file")
+    export.add_argument("genome", nargs="?", default="winner", help="pickled genome")
+    export.add_argument("--out", default="winner.policy.npz", help="policy file to write")
+    export.add_argument("--config", default=os.path.join(os.path.dirname(__file__), "config"), help="NEAT config")
+
+    server = commands.add_parser("serve", help="serve a policy file")
+    server.add_argument("policy", help="policy file")
+    server.add_argument("--listen", default="/tmp/doodle-jump-policy.sock", help="Unix socket path or host:port")
+    server.add_argument("--report-seconds", type=float, default=10, help="print latencies this often")
+
+    benchmark = commands.add_parser("bench", help="measure policy latencies")
+    benchmark.add_argument("policy", help="policy file, run in this process unless --connect is given")
+    benchmark.add_argument("--connect", default=None, help="Unix socket path or host:port of a policy server")
+    benchmark.add_argument("--batch", type=int, nargs="+", default=[1, 16, 256], help="batch sizes")
+    benchmark.add_argument("--requests", type=int, default=10000, help="batches per batch size")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        import pickle
+        import neat
+
+        config = neat.config.Config(
+            neat.DefaultGenome,
+            neat.DefaultReproduction,
+            neat.DefaultSpeciesSet,
+            neat.DefaultStagnation,
+            args.config
+        )
+
+        with open(args.genome, "rb") as f:
+            genome = pickle.load(f)
+
+        export_policy(genome, config, args.out)
+        policy = Policy(args.out)
+        print("Exported genome {0} to {1}: {2} mismatches with neat-python in 1000 inputs".format(
+            genome.key, args.out, check_policy(policy, genome, config)
+        ))
+    elif args.command == "serve":
+        serve(args.policy, args.listen, args.report_seconds)
+    else:
+        policy = Policy(args.policy)
+
+        if args.connect:
+            client = PolicyClient(args.connect)
+            bench(client.actions, policy.num_inputs, args.batch, args.requests)
+            client.close()
+        else:
+            bench(policy.actions, policy.num_inputs, args.batch, args.requests)
@@ -0,0 +1,156 @@
+import time
+import json
+import numpy as np
+import histograms
+from neat.reporting import BaseReporter
+
+# Frame loop phases, in loop order
+PHASES = ["events", "platforms", "movement", "sensing", "activation", "collision", "fitness", "render"]
+
+# Per-frame phase duration histogram bins, log-spaced from 1 microsecond to
+# 10 seconds
+BIN_EDGES = histograms.log_edges(-6, 1, 10)
+
+# Frame Profiler
+# Times the phases of the simulation frame loop. Durations are kept per
+# frame until flushed into per-phase totals and histograms, so memory stays
+# bounded however long a generation runs.
+class FrameProfiler:
+    FLUSH_SIZE = 4096
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.totals = dict((phase, 0.0) for phase in PHASES)
+        self.histograms = dict((phase, histograms.empty(BIN_EDGES)) for phase in PHASES)
+        self.samples = dict((phase, []) for phase in PHASES)
+        self.frame = {}
+        self.pending = 0
+        self.frames = 0
+        self.agent_frames = 0
+        self.agent_decisions = 0
+        self.alive_max = 0
+        self.last = 0.0
+
+    def begin_frame(self):
+        self.last = time.perf_counter()
+
+    # Add the time since the previous lap to a phase
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.frame[phase] = self.frame.get(phase, 0.0) + now - self.last
+        self.last = now
+
+    # End a frame of `alive` players, of which `decisions` sensed and
+    # activated their networks
+    def end_frame(self, alive, decisions):
+        # Only phases that ran in this frame get a sample, so the ones
+        # that were skipped don't pull their percentiles down
+        for phase, duration in self.frame.items():
+            self.samples[phase].append(duration)
+
+        self.frame = {}
+        self.pending += 1
+        self.frames += 1
+        self.agent_frames += alive
+        self.agent_decisions += decisions
+        self.alive_max = max(self.alive_max, alive)
+
+        if self.pending >= self.FLUSH_SIZE:
+            self.flush()
+
+    # Move kept frame durations into the totals and histograms
+    def flush(self):
+        for phase in PHASES:
+            samples = np.array(self.samples[phase])
+            self.totals[phase] += samples.sum()
+            histograms.add(self.histograms[phase], BIN_EDGES, samples)
+            self.samples[phase] = []
+
+        self.pending = 0
+
+    # Add the stats of another, flushed profiler
+    def merge(self, other):
+        for phase in PHASES:
+            self.totals[phase] += other.totals[phase]
+            self.histograms[phase] += other.histograms[phase]
+
+        self.frames += other.frames
+        self.agent_frames += other.agent_frames
+        self.agent_decisions += other.agent_decisions
+        self.alive_max = max(self.alive_max, other.alive_max)
+
+    # Per-frame duration below which a fraction q of the frames of a phase
+    # fall, as the upper edge of the histogram bin it is in
+    def percentile(self, phase, q):
+        return histograms.percentile(self.histograms[phase], BIN_EDGES, q)
+
+    def summary(self):
+        self.flush()
+
+        return {
+            "frames": self.frames,
+            "agent_frames": int(self.agent_frames),
+            "agent_decisions": int(self.agent_decisions),
+            "alive_max": int(self.alive_max),
+            "alive_mean": self.agent_frames / self.frames if self.frames else 0.0,
+            "phases": dict((phase, {
+                "total": self.totals[phase],
+                "p50": self.percentile(phase, 0.5),
+                "p90": self.percentile(phase, 0.9),
+                "p99": self.percentile(phase, 0.99),
+                "histogram": self.histograms[phase].tolist()
+            }) for phase in PHASES)
+        }
+
+# Null Profiler
+# Stands in when profiling is off, so the frame loop hooks cost next to nothing
+class NullProfiler:
+    def begin_frame(self):
+        pass
+
+    def lap(self, phase):
+        pass
+
+    def end_frame(self, alive, decisions):
+        pass
+
+NULL_PROFILER = NullProfiler()
+
+# Profiling Reporter
+# Resets the profiler every generation and reports where the frame loop
+# spent its time, to stdout and/or as one JSON line per generation
+class ProfilingReporter(BaseReporter):
+    def __init__(self, profiler, filename=None, show=True):
+        self.profiler = profiler
+        self.filename = filename
+        self.show = show
+        self.generation = None
+
+    def start_generation(self, generation):
+        self.generation = generation
+        self.profiler.reset()
+
+    def post_evaluate(self, config, population, species, best_genome):
+        summary = self.profiler.summary()
+        summary["generation"] = self.generation
+
+        if self.show:
+            total = sum(stats["total"] for stats in summary["phases"].values())
+            print("Frames: {0} with {1:.1f} agents on average ({2} at most), {3} decisions".format(
+                summary["frames"], summary["alive_mean"], summary["alive_max"], summary["agent_decisions"]
+            ))
+
+            for phase, stats in summary["phases"].items():
+                print("  {0: <10} {1: >8.3f} sec {2: >5.1f}%  p50 {3:.3f} ms  p99 {4:.3f} ms".format(
+                    phase,
+                    stats["total"],
+                    100 * stats["total"] / total if total else 0.0,
+                    1000 * stats["p50"],
+                    1000 * stats["p99"]
+                ))
+
+        if self.filename:
+            with open(self.filename, "a") as f:
+                f.write(json.dumps(summary) + "\n")
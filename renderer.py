@@ -0,0 +1,236 @@
+import pygame
+from assets import ASSETS
+from live import top_players
+
+# Renderer
+# Window that draws the simulation at a capped frame rate. Importing this
+# module imports pygame, so headless runs never do.
+class Renderer:
+    FPS = 60
+
+    def __init__(self, width, height, sensor, collision_margin, debug=False):
+        self.win = pygame.display.set_mode((width, height))
+        self.clock = pygame.time.Clock()
+        self.assets = ASSETS.load()
+        self.sensor = sensor
+        self.collision_margin = collision_margin
+        self.debug = debug
+        self.overlays = {}
+
+    # Wait for the next frame, returns the window events
+    def tick(self):
+        self.clock.tick(self.FPS)
+        events = pygame.event.get()
+
+        # Quit Game
+        for event in events:
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                quit()
+
+        return events
+
+    # Draw objects in window
+    def draw(self, state, platforms, score):
+        self.win.blit(self.assets.bg_sprite, (0, 0))
+
+        self.draw_platforms(platforms)
+
+        self.win.blit(
+            self.assets.score_font.render(str(score), 1, (0, 0, 0)),
+            (10, 10)
+        )
+
+        self.draw_players(state)
+
+        pygame.display.update()
+
+    # Sprite of a player, by jump phase and facing
+    def player_image(self, state, i):
+        assets = self.assets
+
+        # Jump animation
+        if state.jump_tick[i] < 7:
+            if state.velocity_x[i] >= 0:
+                return assets.player_jump_sprite_right
+
+            return assets.player_jump_sprite_left
+
+        if state.velocity_x[i] >= 0:
+            return assets.player_sprite_right
+
+        return assets.player_sprite_left
+
+    # Players to draw, all living ones
+    def spectated(self, state):
+        return state.living()
+
+    # Blit debug text, returns the rectangle it covers
+    def text(self, text, position):
+        return self.win.blit(self.assets.debug_font.render(text, 1, (0, 0, 0)), position)
+
+    # Translucent rectangle, made once per size and color
+    def overlay(self, width, height, color):
+        key = (width, height, color)
+        surface = self.overlays.get(key)
+
+        if surface is None:
+            surface = pygame.Surface((width, height))
+            surface.set_alpha(128)
+            surface.fill(color)
+            self.overlays[key] = surface
+
+        return surface
+
+    # Draw Players, returns the rectangles drawn
+    def draw_players(self, state):
+        win = self.win
+        rects = []
+
+        for i in self.spectated(state):
+            x = state.x[i]
+            y = state.y[i]
+
+            rects.append(win.blit(self.player_image(state, i), (x, y)))
+
+            # In Debug Mode, draw visible collision and coordinates
+            if self.debug:
+                rects.append(self.text("Y: " + str(round(y)) + "; X: " + str(round(x)), (x, y)))
+                rects.append(win.blit(
+                    self.overlay(state.width // 2, self.collision_margin, (0, 35, 255)),
+                    (x + (state.width / 4), y + state.height)
+                ))
+
+                for r, rays in enumerate(self.sensor.polygons_at(x, y)):
+                    for ray in rays:
+                        color = (75, 50, 255)
+
+                        if state.rays_collided[i, r] == 1:
+                            color = (35, 255, 0)
+
+                        rects.append(pygame.draw.polygon(win, color, ray, 2))
+
+        return rects
+
+    # Draw Platforms, returns the rectangles drawn
+    def draw_platforms(self, platforms):
+        win = self.win
+        width = platforms.width
+        height = platforms.height
+        rects = []
+
+        for x, y, _, _ in platforms.boxes():
+            rects.append(win.blit(self.assets.platform_sprite, (x, y)))
+
+            # In Debug Mode, draw visible collision and coordinates
+            if self.debug:
+                # X and Y values
+                rects.append(self.text("Y: " + str(round(y)) + "; X: " + str(round(x)), (x, y)))
+
+                # Collision area
+                rects.append(win.blit(self.overlay(width, height, (255, 0, 25)), (x, y)))
+
+                # Raycast area
+                pygame.draw.rect(win, (75, 50, 255), (x, y, width, height), 2)
+
+        return rects
+
+# Glyph Cache
+# Renders text from cached per-character surfaces instead of rendering a new
+# surface for every string
+class GlyphCache:
+    def __init__(self, font, color=(0, 0, 0)):
+        self.font = font
+        self.color = color
+        self.glyphs = {}
+
+    def glyph(self, char):
+        surface = self.glyphs.get(char)
+
+        if surface is None:
+            surface = self.font.render(char, 1, self.color)
+            self.glyphs[char] = surface
+
+        return surface
+
+    # Blit text at a position, returns the rectangle it covers
+    def blit(self, win, text, position):
+        x, y = position
+        rect = None
+
+        for char in text:
+            glyph_rect = win.blit(self.glyph(char), (x, y))
+            x += glyph_rect.width
+            rect = glyph_rect if rect is None else rect.union(glyph_rect)
+
+        return rect
+
+# Spectator Renderer
+# Cheap renderer for watching a training run. It draws only every k-th
+# simulation frame and only the top_n living players by fitness. Instead of
+# redrawing the whole window it restores the background under what was drawn
+# last time and updates just those rectangles. Text is drawn from cached
+# glyphs and the debug overlays are surfaces made once. The frame rate is not
+# capped, so the simulation runs at nearly headless speed.
+class SpectatorRenderer(Renderer):
+    FPS = 0
+
+    def __init__(self, width, height, sensor, collision_margin, debug=False, every=4, top_n=10):
+        Renderer.__init__(self, width, height, sensor, collision_margin, debug)
+        self.every = max(1, every)
+        self.top_n = top_n
+        self.frame = 0
+        self.dirty = None
+        self.score_glyphs = GlyphCache(self.assets.score_font)
+        self.debug_glyphs = GlyphCache(self.assets.debug_font)
+
+    # Only handle the clock and window events on frames that are drawn
+    def tick(self):
+        if self.frame % self.every == 0:
+            return Renderer.tick(self)
+
+        return []
+
+    def draw(self, state, platforms, score):
+        self.frame += 1
+
+        if (self.frame - 1) % self.every:
+            return
+
+        win = self.win
+        background = self.assets.bg_sprite
+
+        # First frame draws the whole window, later ones clear what was drawn
+        if self.dirty is None:
+            win.blit(background, (0, 0))
+        else:
+            for rect in self.dirty:
+                win.blit(background, rect, rect)
+
+        rects = self.draw_platforms(platforms)
+        rects.append(self.score_glyphs.blit(win, str(score), (10, 10)))
+        rects += self.draw_players(state)
+
+        if self.dirty is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(self.dirty + rects)
+
+        self.dirty = rects
+
+    # Living players with the highest fitness, at most top_n of them
+    def spectated(self, state):
+        return top_players(state, self.top_n)
+
+    # Blit debug text from cached glyphs
+    def text(self, text, position):
+        return self.debug_glyphs.blit(self.win, text, position)
+
+# Live Renderer
+# Spectator renderer that draws every snapshot it is given of a simulation
+# running in another process, at a capped frame rate
+class LiveRenderer(SpectatorRenderer):
+    FPS = 60
+
+    def __init__(self, width, height, sensor, collision_margin, debug=False):
+        SpectatorRenderer.__init__(self, width, height, sensor, collision_margin, debug, 1, 0)
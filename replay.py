@@ -0,0 +1,134 @@
+import os
+import numpy as np
+
+MAGIC = b"DJRP"
+VERSION = 1
+
+# Fixed-size file header
+HEADER_DTYPE = np.dtype([
+    ("magic", "S4"),
+    ("version", "<u2"),
+    ("reserved", "<u2"),
+    ("level_seed", "<i8"),
+    ("genome", "<i8"),
+    ("frames", "<u4"),
+    ("fitness", "<f8")
+])
+
+# One record per simulated frame, 11 bytes
+FRAME_DTYPE = np.dtype([
+    ("x", "<f4"),
+    ("y", "<f4"),
+    ("action", "i1"),
+    ("scroll", "u1"),
+    ("sprite", "u1")
+])
+
+# Sprite flags
+JUMPING = 1
+FACING_LEFT = 2
+
+# Path of the replay of a genome in a directory, and of one of its levels
+# when it played several
+def replay_path(directory, genome, level_seed=None):
+    if level_seed is None:
+        return os.path.join(directory, "genome-{0}.replay".format(genome))
+
+    return os.path.join(directory, "genome-{0}-level-{1}.replay".format(genome, level_seed))
+
+# Read the header of a replay and memory-map its frames
+def load_replay(path):
+    header = np.fromfile(path, HEADER_DTYPE, 1)
+
+    if len(header) == 0 or header[0]["magic"] != MAGIC:
+        raise ValueError("{0} is not a replay".format(path))
+
+    if header[0]["version"] != VERSION:
+        raise ValueError("{0} has unsupported replay version {1}".format(path, header[0]["version"]))
+
+    # Frames are counted from the file size, so unfinished replays play too
+    count = (os.path.getsize(path) - HEADER_DTYPE.itemsize) // FRAME_DTYPE.itemsize
+
+    if count == 0:
+        return header[0], np.zeros(0, dtype=FRAME_DTYPE)
+
+    return header[0], np.memmap(path, FRAME_DTYPE, "r", HEADER_DTYPE.itemsize, (count,))
+
+# Replay Recorder
+# Writes one replay file per player of a simulated population: the level seed
+# and, for every frame it was alive, the player's action, position, how far
+# the level scrolled and which sprite it showed. Frames are collected in a
+# small per-genome block and appended to the files whenever the block is
+# full, so memory stays bounded however many frames are recorded.
+class ReplayRecorder:
+    BLOCK_FRAMES = 64
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    # Start the replays of players of the given genomes on the given levels
+    def begin(self, keys, level_seeds):
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Genomes that play several levels get a replay per level
+        if len(set(level_seeds)) > 1:
+            self.paths = [replay_path(self.directory, key, seed) for key, seed in zip(keys, level_seeds)]
+        else:
+            self.paths = [replay_path(self.directory, key) for key in keys]
+
+        self.frames = np.zeros(len(keys), dtype=np.int64)
+        self.block = np.zeros((len(keys), self.BLOCK_FRAMES), dtype=FRAME_DTYPE)
+        self.block_start = 0
+        self.frame = 0
+
+        for path, key, level_seed in zip(self.paths, keys, level_seeds):
+            header = np.zeros(1, dtype=HEADER_DTYPE)
+            header["magic"] = MAGIC
+            header["version"] = VERSION
+            header["level_seed"] = level_seed
+            header["genome"] = -1 if key is None else key
+
+            with open(path, "wb") as f:
+                header.tofile(f)
+
+    # Record the frame of the given players, alive at its start, and how far
+    # their worlds scrolled
+    def record(self, index, actions, state, scroll):
+        column = self.frame - self.block_start
+        block = self.block
+        block["x"][index, column] = state.x[index]
+        block["y"][index, column] = state.y[index]
+        block["action"][index, column] = actions
+        block["scroll"][index, column] = scroll
+        block["sprite"][index, column] = (
+            (state.jump_tick[index] < 7) * JUMPING |
+            (state.velocity_x[index] < 0) * FACING_LEFT
+        )
+
+        self.frames[index] += 1
+        self.frame += 1
+
+        if self.frame - self.block_start == self.BLOCK_FRAMES:
+            self.flush()
+
+    # Append the collected frames to the files
+    def flush(self):
+        rows = np.clip(self.frames - self.block_start, 0, self.frame - self.block_start)
+
+        for i in np.flatnonzero(rows):
+            with open(self.paths[i], "ab") as f:
+                self.block[i, :rows[i]].tofile(f)
+
+        self.block_start = self.frame
+
+    # Write the last frames and complete the headers
+    def end(self, fitness):
+        self.flush()
+
+        for path, frames, value in zip(self.paths, self.frames, fitness):
+            header = np.fromfile(path, HEADER_DTYPE, 1)
+            header["frames"] = frames
+            header["fitness"] = value
+
+            with open(path, "r+b") as f:
+                header.tofile(f)
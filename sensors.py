@@ -0,0 +1,167 @@
+import numpy as np
+
+# Ray Sensor
+# Casts the 12 platform detection rays of a whole population at once.
+# Each ray is a thin quad of RAY_WIDTH pixels, tested as its two long edges
+# (segments) against axis-aligned platform boxes; platforms are always
+# thicker than a ray, so that gives the same hits as the full quad.
+# Rays near a wall are also tested shifted by one window width so platforms
+# across the wrap-around border are seen as well.
+class RaySensor:
+    # Rays mirrored to the right side when close to the left wall, and the
+    # other way around
+    MIRROR_LEFT = [0, 1, 2, 7, 8]
+    MIRROR_RIGHT = [4, 5, 6, 10, 11]
+
+    def __init__(self, player_width, player_height, window_width, ray_size, ray_width):
+        self.player_width = player_width
+        self.player_height = player_height
+        self.window_width = window_width
+        self.ray_size = ray_size
+        self.ray_width = ray_width
+
+        self.polygons = self.ray_polygons(player_width, player_height, ray_size, ray_width)
+
+        # Vertical reach of all rays, relative to the player's y
+        self.top = min(y for polygon in self.polygons for _, y in polygon)
+        self.bottom = max(y for polygon in self.polygons for _, y in polygon)
+
+        # Two longest edges of every ray quad, as (rays, edges) arrays
+        start_x, start_y, end_x, end_y = [], [], [], []
+
+        for polygon in self.polygons:
+            edges = [(polygon[i], polygon[(i + 1) % 4]) for i in range(4)]
+            edges.sort(key=lambda e: (e[1][0] - e[0][0]) ** 2 + (e[1][1] - e[0][1]) ** 2)
+
+            start_x.append([e[0][0] for e in edges[2:]])
+            start_y.append([e[0][1] for e in edges[2:]])
+            end_x.append([e[1][0] for e in edges[2:]])
+            end_y.append([e[1][1] for e in edges[2:]])
+
+        self.start_x = np.array(start_x)
+        self.start_y = np.array(start_y)
+        self.direction_x = np.array(end_x) - self.start_x
+        self.direction_y = np.array(end_y) - self.start_y
+
+        self.mirror_left = np.zeros(len(self.polygons), dtype=bool)
+        self.mirror_left[self.MIRROR_LEFT] = True
+        self.mirror_right = np.zeros(len(self.polygons), dtype=bool)
+        self.mirror_right[self.MIRROR_RIGHT] = True
+
+        # Horizontal shift of each ray copy: original, mirrored right, mirrored left
+        self.shifts = np.array([0, window_width, -window_width])
+
+    # Corners of every ray quad, relative to the player's top-left corner
+    @staticmethod
+    def ray_polygons(w, h, size, width):
+        return [
+            # Left
+            [(-size, h / 2), (-size, h / 2 + width), (w / 2, h / 2 + width), (w / 2, h / 2)],
+            # Left left top
+            [(-size * 0.85, h / 2 - size * 0.65), (-size * 0.85, h / 2 - size * 0.65 - width), (w / 2, h / 2 + width), (w / 2, h / 2)],
+            # Left top top
+            [(-size * 0.15, -size * 0.85), (-size * 0.15 - width, -size * 0.85), (w / 2, h / 2 + width), (w / 2, h / 2)],
+            # Top
+            [(w / 2 - width / 2, -size), (w / 2 - width / 2, h / 2), (w / 2 + width / 2, h / 2), (w / 2 + width / 2, -size)],
+            # Top top right
+            [(w + size * 0.15, -size * 0.85), (w + size * 0.15 - width, -size * 0.85), (w / 2, h / 2 + width), (w / 2, h / 2)],
+            # Top right right
+            [(w + size * 0.85, h / 2 - size * 0.65), (w + size * 0.85, h / 2 - size * 0.65 - width), (w / 2, h / 2 + width), (w / 2, h / 2)],
+            # Right
+            [(w + size, h / 2), (w + size, h / 2 + width), (w / 2, h / 2 + width), (w / 2, h / 2)],
+            # Bottom left left
+            [(-size * 0.85, h / 2 + size * 0.65), (-size * 0.85, h / 2 + size * 0.65 - width), (w / 2, h / 2 + width), (w / 2, h / 2)],
+            # Bottom bottom left
+            [(-size * 0.15, h + size * 0.85), (-size * 0.15 - width, h + size * 0.85), (w / 2, h / 2 + width), (w / 2, h / 2)],
+            # Bottom
+            [(w / 2 - width / 2, h + size), (w / 2 - width / 2, h / 2), (w / 2 + width / 2, h / 2), (w / 2 + width / 2, h + size)],
+            # Bottom bottom right
+            [(w + size * 0.15, h + size * 0.85), (w + size * 0.15 - width, h + size * 0.85), (w / 2, h / 2 + width), (w / 2, h / 2)],
+            # Bottom right right
+            [(w + size * 0.85, h / 2 + size * 0.65), (w + size * 0.85, h / 2 + size * 0.65 - width), (w / 2, h / 2 + width), (w / 2, h / 2)]
+        ]
+
+    # Which ray copies are active for each player, shape (players, rays, 3)
+    def active(self, xs):
+        xs = np.asarray(xs, dtype=float)
+        near_left = xs < self.ray_size
+        near_right = ~near_left & (xs + self.player_width > self.window_width - self.ray_size)
+
+        active = np.zeros((len(xs), len(self.polygons), 3), dtype=bool)
+        active[:, :, 0] = True
+        active[:, :, 1] = near_left[:, None] & self.mirror_left[None, :]
+        active[:, :, 2] = near_right[:, None] & self.mirror_right[None, :]
+
+        return active
+
+    # Detect platforms for every player, returns 0/1 array of shape (players, rays).
+    # Platforms are (platforms, 4) boxes shared by all players, or padded
+    # (players, platforms, 4) boxes per player with a (players, platforms)
+    # mask of which are real.
+    def detect(self, xs, ys, platforms, valid=None):
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        platforms = np.asarray(platforms, dtype=float)
+
+        if platforms.ndim < 3:
+            platforms = platforms.reshape(1, -1, 4)
+
+        if len(xs) == 0 or platforms.shape[1] == 0:
+            return np.zeros((len(xs), len(self.polygons)), dtype=np.int8)
+
+        if valid is None:
+            valid = np.ones(platforms.shape[:2], dtype=bool)
+
+        # Broadcast to (players, rays, edges, copies, platforms)
+        px = (xs[:, None, None, None] + self.start_x[None, :, :, None] + self.shifts)[..., None]
+        py = (ys[:, None, None] + self.start_y[None, :, :])[..., None, None]
+        dx = self.direction_x[None, :, :, None, None]
+        dy = self.direction_y[None, :, :, None, None]
+
+        left = platforms[:, None, None, None, :, 0]
+        top = platforms[:, None, None, None, :, 1]
+        right = left + platforms[:, None, None, None, :, 2]
+        bottom = top + platforms[:, None, None, None, :, 3]
+
+        near_x, far_x = self._slab(px, dx, left, right)
+        near_y, far_y = self._slab(py, dy, top, bottom)
+
+        near = np.maximum(np.maximum(near_x, near_y), 0)
+        far = np.minimum(np.minimum(far_x, far_y), 1)
+        hits = (near <= far) & self.active(xs)[:, :, None, :, None] & valid[:, None, None, None, :]
+
+        return hits.any(axis=(2, 3, 4)).astype(np.int8)
+
+    # Entry and exit of a segment through a slab, as fractions of the segment
+    @staticmethod
+    def _slab(origin, direction, low, high):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_low = (low - origin) / direction
+            t_high = (high - origin) / direction
+
+        near = np.minimum(t_low, t_high)
+        far = np.maximum(t_low, t_high)
+
+        # Segments parallel to the slab are either always or never inside
+        parallel = direction == 0
+        inside = (origin >= low) & (origin <= high)
+        near = np.where(parallel, np.where(inside, -np.inf, np.inf), near)
+        far = np.where(parallel, np.where(inside, np.inf, -np.inf), far)
+
+        return near, far
+
+    # Ray quads of a single player, grouped per ray including mirrors
+    def polygons_at(self, x, y):
+        active = self.active([x])[0]
+        rays = []
+
+        for i, polygon in enumerate(self.polygons):
+            copies = []
+
+            for copy, shift in enumerate(self.shifts):
+                if active[i, copy]:
+                    copies.append([(x + shift + px, y + py) for px, py in polygon])
+
+            rays.append(copies)
+
+        return rays
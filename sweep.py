@@ -0,0 +1,287 @@
+import os
+import csv
+import time
+import random
+import argparse
+import itertools
+import importlib
+import contextlib
+import configparser
+import multiprocessing
+import numpy as np
+from telemetry import read_records
+
+# Table columns after the swept parameters
+COLUMNS = ["generations", "to_threshold", "best_fitness", "wall_seconds", "cpu_seconds", "frames", "error"]
+
+# Parse a "key=values" parameter: comma-separated choices, or a lo:hi
+# range to sample from uniformly, of ints when both ends are ints
+def parse_parameter(text):
+    key, _, values = text.partition("=")
+
+    if not key or not values:
+        raise ValueError("Expected key=a,b,c or key=lo:hi, got " + text)
+
+    if ":" in values:
+        low, high = (parse_value(value) for value in values.split(":", 1))
+
+        return key, (low, high)
+
+    return key, [parse_value(value) for value in values.split(",")]
+
+def parse_value(text):
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+
+    return text
+
+# Parameter sets of a sweep: every combination of the choices, or samples
+# drawn from the choices and ranges with a seeded RNG
+def variants(parameters, samples=None, seed=0):
+    if not samples:
+        ranges = [key for key, values in parameters if isinstance(values, tuple)]
+
+        if ranges:
+            raise ValueError("Ranges need --samples: " + ", ".join(ranges))
+
+        keys = [key for key, _ in parameters]
+
+        return [dict(zip(keys, values)) for values in itertools.product(*(values for _, values in parameters))]
+
+    rng = np.random.default_rng(seed)
+    sets = []
+
+    for _ in range(samples):
+        params = {}
+
+        for key, values in parameters:
+            if not isinstance(values, tuple):
+                params[key] = values[rng.integers(len(values))]
+            elif isinstance(values[0], int) and isinstance(values[1], int):
+                params[key] = int(rng.integers(values[0], values[1] + 1))
+            else:
+                params[key] = round(float(rng.uniform(values[0], values[1])), 4)
+
+        sets.append(params)
+
+    return sets
+
+# Write a copy of a NEAT config with the given keys changed, wherever
+# section they are in
+def write_config(config_path, params, path):
+    config = configparser.ConfigParser()
+    config.read(config_path)
+
+    for key, value in params.items():
+        sections = [section for section in config.sections() if config.has_option(section, key)]
+
+        for section in sections:
+            config.set(section, key, str(value))
+
+    with open(path, "w") as f:
+        config.write(f)
+
+    return float(config.get("NEAT", "fitness_threshold"))
+
+# Raise ValueError for keys that are not in a NEAT config
+def check_keys(config_path, keys):
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    unknown = [key for key in keys if not any(config.has_option(section, key) for section in config.sections())]
+
+    if unknown:
+        raise ValueError("Unknown config keys: " + ", ".join(unknown))
+
+# Limit the address space of a sweep process
+def init_variant(memory_mb):
+    if memory_mb:
+        import resource
+
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+# Train one variant in its own directory, with output going to its log.
+# Every variant starts from the same RNG state and plays the same seeded
+# levels, so only its config differs. Returns its row of the results.
+def run_variant(job):
+    index, params, directory, options = job
+    config_path = os.path.join(directory, "config")
+    telemetry_file = os.path.join(directory, "telemetry.jsonl")
+    result = dict(params, variant=index, generations=0, to_threshold=None, best_fitness=None,
+                  wall_seconds=0.0, cpu_seconds=0.0, frames=0, error="")
+    start = time.perf_counter()
+    start_cpu = time.process_time()
+
+    try:
+        threshold = write_config(options["config"], params, config_path)
+
+        game = importlib.import_module("doodle-jump")
+        game.HEADLESS = True
+        game.EPISODES = game.episode_policy(
+            options["max_frames"],
+            options["max_idle_jumps"],
+            options["cull_stuck"],
+            options["full_episodes"]
+        )
+        game.LEVELS.cache_dir = options["level_cache"]
+        random.seed(options["seed"])
+
+        with open(os.path.join(directory, "log.txt"), "w") as log, contextlib.redirect_stdout(log):
+            game.run(
+                config_path,
+                seed=options["seed"],
+                checkpoint_prefix=os.path.join(directory, "neat-checkpoint-"),
+                levels=options["levels"],
+                aggregate=options["aggregate"],
+                fixed_levels=options["fixed_levels"],
+                telemetry_file=telemetry_file,
+                generations=options["generations"],
+                winner_path=os.path.join(directory, "winner")
+            )
+    except Exception as e:
+        result["error"] = "{0}: {1}".format(type(e).__name__, e)
+        threshold = None
+
+    result["wall_seconds"] = time.perf_counter() - start
+    result["cpu_seconds"] = time.process_time() - start_cpu
+
+    if os.path.exists(telemetry_file):
+        with open(telemetry_file) as f:
+            for record in read_records(f, False):
+                result["generations"] += 1
+                result["frames"] += record["frames"]
+
+                if result["best_fitness"] is None or record["best_fitness"] > result["best_fitness"]:
+                    result["best_fitness"] = record["best_fitness"]
+
+                if result["to_threshold"] is None and threshold is not None and record["best_fitness"] >= threshold:
+                    result["to_threshold"] = result["generations"]
+
+    return result
+
+# Variants that reached the threshold first, in the fewest generations,
+# then the rest by best fitness
+def rank(result):
+    if result["to_threshold"] is not None:
+        return (0, result["to_threshold"], result["wall_seconds"])
+
+    return (1, -(result["best_fitness"] or 0.0), result["wall_seconds"])
+
+def format_value(value):
+    if value is None:
+        return "-"
+
+    if isinstance(value, float):
+        return "{0:.4g}".format(value) if abs(value) < 1000 else "{0:.0f}".format(value)
+
+    return str(value)
+
+def print_table(results, keys):
+    header = ["variant"] + keys + COLUMNS
+    rows = [[format_value(result[column]) for column in header] for result in results]
+    widths = [max(len(text) for text in column) for column in zip(header, *rows)]
+
+    for row in [header] + rows:
+        print("  ".join(text.rjust(width) for text, width in zip(row, widths)).rstrip())
+
+# Train the variants of a sweep on a process pool of at most `processes`
+# variants at a time. Each process trains one variant and exits, so memory
+# is returned between variants. Results are written to results.csv in the
+# sweep directory, ranked.
+def sweep(parameters, directory, processes=None, samples=None, search_seed=0, memory_mb=None, **options):
+    sets = variants(parameters, samples, search_seed)
+    keys = [key for key, _ in parameters]
+    options.setdefault("level_cache", os.path.join(directory, "levels"))
+    jobs = []
+
+    for index, params in enumerate(sets):
+        variant_dir = os.path.join(directory, "variant-{0}".format(index))
+        os.makedirs(variant_dir, exist_ok=True)
+        jobs.append((index, params, variant_dir, options))
+
+    processes = min(processes or os.cpu_count() or 1, len(jobs))
+    results = []
+
+    print("Sweeping {0} variants of {1} on {2} processes".format(len(jobs), ", ".join(keys), processes))
+
+    with multiprocessing.Pool(processes, init_variant, (memory_mb,), maxtasksperchild=1) as pool:
+        for result in pool.imap_unordered(run_variant, jobs):
+            results.append(result)
+            print("variant {0} done: {1}".format(result["variant"], ", ".join(
+                "{0}={1}".format(column, format_value(result[column])) for column in keys + COLUMNS[:5]
+            )), flush=True)
+
+    results.sort(key=rank)
+
+    with open(os.path.join(directory, "results.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, ["variant"] + keys + COLUMNS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(results)
+
+    print_table(results, keys)
+
+    return results
+
+# Sweep NEAT config values
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NEAT Doodle Jump hyperparameter sweep")
+    parser.add_argument(
+        "parameters",
+        nargs="+",
+        help="config key=a,b,c to try each value, or key=lo:hi to sample from a range with --samples"
+    )
+    parser.add_argument("--samples", type=int, default=None, help="random search of this many variants instead of a grid")
+    parser.add_argument("--search-seed", type=int, default=0, help="seed of the random search")
+    parser.add_argument("--out", default="sweep", help="directory of the variants and results.csv")
+    parser.add_argument("--processes", type=int, default=None, help="variants trained at once (default: CPU count)")
+    parser.add_argument("--memory-mb", type=int, default=None, help="address space limit of each variant's process")
+    parser.add_argument("--generations", type=int, default=50, help="generations each variant trains at most")
+    parser.add_argument("--max-frames", type=int, default=5000, help="stop an episode after this many frames")
+    parser.add_argument(
+        "--max-idle-jumps",
+        type=int,
+        default=6,
+        help="end an episode when all players landed this many times without climbing higher (0 to never)"
+    )
+    parser.add_argument("--cull-stuck", action="store_true", help="remove players as soon as they are stuck")
+    parser.add_argument("--full-episodes", action="store_true", help="play episodes out, even past the threshold")
+    parser.add_argument("--seed", type=int, default=0, help="level seed of the first generation, shared by all variants")
+    parser.add_argument("--levels", type=int, default=1, help="levels each genome plays per generation")
+    parser.add_argument("--aggregate", default="mean", help="fitness over the levels: mean, min or a quantile")
+    parser.add_argument("--fixed-levels", action="store_true", help="play the same levels every generation")
+    parser.add_argument(
+        "--config",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "config"),
+        help="NEAT config the variants change"
+    )
+    args = parser.parse_args()
+
+    try:
+        parameters = [parse_parameter(text) for text in args.parameters]
+        variants(parameters, args.samples, args.search_seed)
+        check_keys(args.config, [key for key, _ in parameters])
+        importlib.import_module("doodle-jump").check_aggregate(args.aggregate)
+    except ValueError as e:
+        parser.error(str(e))
+
+    sweep(
+        parameters,
+        args.out,
+        args.processes,
+        args.samples,
+        args.search_seed,
+        args.memory_mb,
+        config=args.config,
+        seed=args.seed,
+        levels=args.levels,
+        aggregate=args.aggregate,
+        fixed_levels=args.fixed_levels,
+        generations=args.generations,
+        max_frames=args.max_frames,
+        max_idle_jumps=args.max_idle_jumps,
+        cull_stuck=args.cull_stuck,
+        full_episodes=args.full_episodes
+    )
@@ -0,0 +1,270 @@
+import os
+import csv
+import sys
+import json
+import time
+import argparse
+from collections import deque
+import numpy as np
+from neat.reporting import BaseReporter
+
+# Columns of a telemetry record, in CSV order
+FIELDS = [
+    "generation",
+    "time",
+    "population",
+    "best_fitness",
+    "mean_fitness",
+    "median_fitness",
+    "best_fitness_window",
+    "species",
+    "species_sizes",
+    "nodes_mean",
+    "nodes_max",
+    "connections_mean",
+    "connections_max",
+    "best_nodes",
+    "best_connections",
+    "frames",
+    "score",
+    "seconds",
+    "genomes_per_second",
+    "frames_per_second"
+]
+
+# Telemetry Reporter
+# Streams one record of metrics per generation to an append-only JSONL
+# file, or CSV when the file name ends in .csv. Writes are buffered and
+# flushed at most every flush_seconds, and when training ends. Only the
+# last `window` records are kept in memory, for rolling stats, so memory
+# stays bounded however long training runs.
+class TelemetryReporter(BaseReporter):
+    WINDOW = 100
+    FLUSH_SECONDS = 10
+
+    def __init__(self, filename, evaluator, window=WINDOW, flush_seconds=FLUSH_SECONDS):
+        self.filename = filename
+        self.evaluator = evaluator
+        self.flush_seconds = flush_seconds
+        self.records = deque(maxlen=window)
+        self.csv = filename.endswith(".csv")
+        self.generation = None
+        self.start = None
+        self.last_flush = time.monotonic()
+
+        new = not os.path.exists(filename) or os.path.getsize(filename) == 0
+        self.file = open(filename, "a", newline="")
+
+        if self.csv:
+            self.writer = csv.DictWriter(self.file, FIELDS, lineterminator="\n")
+
+            # The header goes out at once, so a tail started before the
+            # first records can read them
+            if new:
+                self.writer.writeheader()
+                self.flush()
+
+    def start_generation(self, generation):
+        self.generation = generation
+        self.start = time.perf_counter()
+
+    def post_evaluate(self, config, population, species, best_genome):
+        seconds = time.perf_counter() - self.start
+        fitnesses = np.array([g.fitness for g in population.values()])
+        sizes = np.array([g.size() for g in population.values()])
+        frames = self.evaluator.frames
+        best_fitness = float(fitnesses.max())
+
+        record = {
+            "generation": self.generation,
+            "time": time.time(),
+            "population": len(population),
+            "best_fitness": best_fitness,
+            "mean_fitness": float(fitnesses.mean()),
+            "median_fitness": float(np.median(fitnesses)),
+            "best_fitness_window": float(np.mean([r["best_fitness"] for r in self.records] + [best_fitness])),
+            "species": len(species.species),
+            "species_sizes": sorted((len(s.members) for s in species.species.values()), reverse=True),
+            "nodes_mean": float(sizes[:, 0].mean()),
+            "nodes_max": int(sizes[:, 0].max()),
+            "connections_mean": float(sizes[:, 1].mean()),
+            "connections_max": int(sizes[:, 1].max()),
+            "best_nodes": best_genome.size()[0],
+            "best_connections": best_genome.size()[1],
+            "frames": frames,
+            "score": self.evaluator.score,
+            "seconds": seconds,
+            "genomes_per_second": len(population) / seconds if seconds else 0.0,
+            "frames_per_second": frames / seconds if seconds else 0.0
+        }
+        self.records.append(record)
+        self.write(record)
+
+    def write(self, record):
+        if self.csv:
+            row = dict(record)
+            row["species_sizes"] = " ".join(str(size) for size in record["species_sizes"])
+            self.writer.writerow(row)
+        else:
+            self.file.write(json.dumps(record) + "\n")
+
+        if time.monotonic() - self.last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+        self.last_flush = time.monotonic()
+
+    def found_solution(self, config, generation, best):
+        self.flush()
+
+    def complete_extinction(self):
+        self.flush()
+
+    def close(self):
+        self.file.close()
+
+# Lines that were written completely
+def complete_lines(lines):
+    for line in lines:
+        if not line.endswith("\n"):
+            return
+
+        yield line
+
+# Records of telemetry file lines, JSONL or CSV with its header first. A
+# line that is still being written ends them.
+def read_records(lines, csv_file):
+    lines = complete_lines(lines)
+
+    if csv_file:
+        for row in csv.DictReader(lines):
+            yield dict((field, parse_csv_value(field, value)) for field, value in row.items())
+    else:
+        for line in lines:
+            yield json.loads(line)
+
+def parse_csv_value(field, value):
+    if field == "species_sizes":
+        return [int(size) for size in value.split()]
+
+    return float(value)
+
+def format_record(record):
+    return "gen {0:>5}  best {1:>9.1f}  mean {2:>8.1f}  median {3:>8.1f}  species {4:>3}  " \
+           "nodes {5:>5.1f}  conns {6:>5.1f}  score {7:>7}  {8:>7.1f} genomes/s  {9:>9.0f} frames/s".format(
+               int(record["generation"]),
+               record["best_fitness"],
+               record["mean_fitness"],
+               record["median_fitness"],
+               int(record["species"]),
+               record["nodes_mean"],
+               record["connections_mean"],
+               int(record["score"]),
+               record["genomes_per_second"],
+               record["frames_per_second"]
+           )
+
+# Summarize a telemetry file in one pass, keeping only running totals and
+# the last `window` records
+def summarize(path, window=TelemetryReporter.WINDOW):
+    recent = deque(maxlen=window)
+    count = 0
+    best = None
+    seconds = 0.0
+    frames = 0
+
+    with open(path, newline="") as f:
+        for record in read_records(f, path.endswith(".csv")):
+            count += 1
+            seconds += record["seconds"]
+            frames += int(record["frames"])
+            recent.append(record)
+
+            if best is None or record["best_fitness"] > best["best_fitness"]:
+                best = record
+
+    if not count:
+        return {"generations": 0}
+
+    return {
+        "generations": count,
+        "best_fitness": best["best_fitness"],
+        "best_generation": int(best["generation"]),
+        "last_generation": int(recent[-1]["generation"]),
+        "seconds": seconds,
+        "frames": frames,
+        "window": len(recent),
+        "window_best_fitness": max(r["best_fitness"] for r in recent),
+        "window_mean_fitness": float(np.mean([r["mean_fitness"] for r in recent])),
+        "window_seconds_per_generation": float(np.mean([r["seconds"] for r in recent])),
+        "window_frames_per_second": sum(r["frames"] for r in recent) / max(sum(r["seconds"] for r in recent), 1e-9)
+    }
+
+# Print the last records of a telemetry file, then with follow, new ones as
+# they are written
+def tail(path, lines=10, follow=False, interval=1.0):
+    csv_file = path.endswith(".csv")
+
+    with open(path, newline="") as f:
+        header = None
+
+        # A CSV header that isn't completely written yet is read again
+        # until it is, when following
+        while csv_file:
+            f.seek(0)
+            header = f.readline()
+
+            if header.endswith("\n") or not follow:
+                break
+
+            time.sleep(interval)
+
+        position = f.tell()
+
+        # Only the last records are kept while reading up to the end
+        recent = deque(maxlen=lines)
+
+        while True:
+            line = f.readline()
+
+            if not line.endswith("\n"):
+                break
+
+            recent.append(line)
+            position = f.tell()
+
+        for record in read_records([header] + list(recent) if csv_file else recent, csv_file):
+            print(format_record(record))
+
+        while follow:
+            f.seek(position)
+            line = f.readline()
+
+            if not line.endswith("\n"):
+                sys.stdout.flush()
+                time.sleep(interval)
+                continue
+
+            position = f.tell()
+
+            for record in read_records([header, line] if csv_file else [line], csv_file):
+                print(format_record(record))
+
+# Tail or summarize a telemetry file while training writes it
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NEAT Doodle Jump telemetry")
+    parser.add_argument("file", help="telemetry file written with --telemetry")
+    parser.add_argument("--summary", action="store_true", help="print a summary instead of the last records")
+    parser.add_argument("--lines", type=int, default=10, help="number of records to print")
+    parser.add_argument("--follow", action="store_true", help="keep printing records as they are written")
+    parser.add_argument("--window", type=int, default=TelemetryReporter.WINDOW, help="generations in the summary's rolling window")
+    args = parser.parse_args()
+
+    try:
+        if args.summary:
+            print(json.dumps(summarize(args.file, args.window), indent=2))
+        else:
+            tail(args.file, args.lines, args.follow)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,19 @@
+import os
+import sys
+
+# The modules live at the top of the repository, next to doodle-jump.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pytest
+
+# NEAT config of the repository, with a threshold no genome reaches so
+# episodes don't end when one does
+@pytest.fixture
+def config():
+    from benchmark import load_config
+
+    config = load_config()
+    config.fitness_threshold = float("inf")
+
+    return config
@@ -0,0 +1,53 @@
+import time
+import threading
+from distributed import Coordinator, JobBoard, work
+
+def double(job):
+    return 2 * job
+
+# A job whose worker never returns it is leased again after the timeout
+def test_expired_lease_is_requeued():
+    board = JobBoard()
+    board.submit([(0, b"job")])
+
+    assert board.take(1) == (0, b"job")
+    assert board.take(0.01) is None
+    assert board.requeue(60) == 0
+
+    time.sleep(0.05)
+
+    assert board.requeue(0.01) == 1
+    assert board.take(1) == (0, b"job")
+
+# The first result of a job is kept and a late duplicate is ignored
+def test_first_result_wins():
+    board = JobBoard()
+    board.submit([(0, b"job")])
+    board.take(1)
+    time.sleep(0.05)
+    board.requeue(0.01)
+    board.take(1)
+
+    board.finish(0, b"first")
+    board.finish(0, b"late")
+
+    assert board.collect(1) == {0: (b"first", None)}
+    assert board.collect(0.01) == {}
+    assert board.take(0.01) is None
+
+# Jobs mapped on a localhost coordinator come back from a worker in order
+def test_coordinator_round_trip():
+    authkey = b"test-authkey"
+    coordinator = Coordinator(("127.0.0.1", 0), authkey)
+    worker = threading.Thread(target=work, args=(coordinator.address, authkey, double, 0.1), daemon=True)
+    worker.start()
+
+    try:
+        assert coordinator.map([1, 2, 3]) == [2, 4, 6]
+        assert coordinator.map([5]) == [10]
+    finally:
+        coordinator.close()
+
+    worker.join(5)
+
+    assert not worker.is_alive()
@@ -0,0 +1,18 @@
+import random
+import numpy as np
+import neat
+from networks import check_equivalence
+
+# The batched population network picks the same actions as neat-python's
+# FeedForwardNetwork, on mutated genomes with hidden layers
+def test_population_network_matches_neat(config):
+    random.seed(0)
+    genomes = list(neat.Population(config).population.values())[:30]
+
+    for _ in range(20):
+        for genome in genomes:
+            genome.mutate(config.genome_config)
+
+    inputs = np.array([[random.randint(0, 1) for _ in range(config.genome_config.num_inputs)] for _ in range(50)])
+
+    assert check_equivalence(genomes, config, inputs) == 0
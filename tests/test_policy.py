@@ -0,0 +1,31 @@
+import random
+import neat
+from policy import Policy, PolicyServerMixin, check_policy, export_policy
+
+# Exported policies pick the same actions as neat-python's network of the
+# genome, on mutated genomes with hidden layers
+def test_exported_policy_matches_neat(config, tmp_path):
+    random.seed(0)
+    genomes = list(neat.Population(config).population.values())[:10]
+    path = str(tmp_path / "genome.policy.npz")
+
+    for _ in range(20):
+        for genome in genomes:
+            genome.mutate(config.genome_config)
+
+    for genome in genomes:
+        export_policy(genome, config, path)
+
+        assert check_policy(Policy(path), genome, config, 200) == 0
+
+# The server only reports its latencies when batches arrived since the
+# last report
+def test_server_reports_new_batches_only(capsys):
+    server = PolicyServerMixin()
+    server.setup_policy(None, 1e-9)
+    server.service_actions()
+    server.latency.add(1e-5, 1)
+    server.service_actions()
+    server.service_actions()
+
+    assert capsys.readouterr().out.count("batches") == 1
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from benchmark import load_game
+
+shapely = pytest.importorskip("shapely")
+
+# Ray hits of one player as shapely finds them, from the quads the sensor
+# draws in debug mode
+def shapely_hits(sensor, x, y, platforms):
+    boxes = [shapely.box(left, top, left + width, top + height) for left, top, width, height in platforms]
+
+    return [
+        int(any(shapely.Polygon(quad).intersects(platform) for quad in copies for platform in boxes))
+        for copies in sensor.polygons_at(x, y)
+    ]
+
+# The NumPy rays see the same platforms as shapely polygons, with a third of
+# the players close to either wall so the mirrored rays are used
+def test_rays_match_shapely():
+    game = load_game()
+    sensor = game.RAY_SENSOR
+    rng = np.random.default_rng(0)
+    low = -game.PLAYER_WIDTH / 2
+    high = game.WINDOW_WIDTH - game.PLAYER_WIDTH / 2
+    reach = sensor.ray_size
+    mismatches = 0
+
+    for layout in range(3000):
+        if layout % 3 == 0:
+            x = rng.uniform(low, low + reach)
+        elif layout % 3 == 1:
+            x = rng.uniform(high - reach, high)
+        else:
+            x = rng.uniform(low, high)
+
+        y = rng.uniform(0, game.WINDOW_HEIGHT)
+        count = rng.integers(1, game.MAX_PLATFORMS + 1)
+        platforms = np.column_stack((
+            rng.uniform(0, game.WINDOW_WIDTH - game.PLATFORM_WIDTH, count),
+            rng.uniform(y - 1.5 * reach, y + 1.5 * reach, count),
+            np.full(count, game.PLATFORM_WIDTH),
+            np.full(count, game.PLATFORM_HEIGHT)
+        ))
+
+        hits = sensor.detect([x], [y], platforms)[0].tolist()
+
+        if hits != shapely_hits(sensor, x, y, platforms):
+            mismatches += 1
+
+    assert mismatches == 0
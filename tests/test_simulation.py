@@ -0,0 +1,15 @@
+import pytest
+from benchmark import load_game, check_event_driven, check_level_batch
+
+@pytest.fixture(scope="module")
+def game():
+    return load_game()
+
+# Event-driven simulation plays exactly like the frame loop, with and
+# without a decision interval
+def test_event_driven_matches_frame_loop(game, config):
+    assert check_event_driven(game, config, 10, 2, 300, 0, (1, 4)) == 0
+
+# Levels played at once give the same fitnesses as played one by one
+def test_level_batch_matches_levels_one_by_one(game, config):
+    assert check_level_batch(game, config, 10, 2, 300, 0) == 0
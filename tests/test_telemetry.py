@@ -0,0 +1,45 @@
+import csv
+import time
+import threading
+from telemetry import FIELDS, TelemetryReporter, tail
+
+def record(generation):
+    row = dict((field, 1.0) for field in FIELDS)
+    row["generation"] = generation
+    row["species_sizes"] = "3 2"
+
+    return row
+
+# The CSV header is on disk before the first flush of records
+def test_csv_header_written_at_once(tmp_path):
+    path = str(tmp_path / "run.csv")
+    reporter = TelemetryReporter(path, None)
+
+    with open(path) as f:
+        assert f.readline() == ",".join(FIELDS) + "\n"
+
+    reporter.close()
+
+# Following a CSV file that was empty when the tail started prints the
+# records of the header and lines written later
+def test_follow_csv_started_before_header(tmp_path, capsys):
+    path = str(tmp_path / "run.csv")
+    open(path, "w").close()
+    threading.Thread(target=tail, args=(path, 10, True, 0.01), daemon=True).start()
+    time.sleep(0.05)
+
+    with open(path, "a", newline="") as f:
+        writer = csv.DictWriter(f, FIELDS, lineterminator="\n")
+        writer.writeheader()
+
+        for generation in range(3):
+            writer.writerow(record(generation))
+
+    printed = ""
+    deadline = time.monotonic() + 5
+
+    while printed.count("\n") < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+        printed += capsys.readouterr().out
+
+    assert printed.count("gen ") == 3